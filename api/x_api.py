@@ -4,9 +4,12 @@ import logging
 import os
 from pathlib import Path
 import sys
+from typing import TYPE_CHECKING
 
-import tweety
-from tweety.types.twDataTypes import Tweet, User
+from utils import metrics
+
+if TYPE_CHECKING:
+    from tweety.types.twDataTypes import User
 
 
 logger = logging.getLogger('discord')
@@ -19,17 +22,34 @@ if sys.platform == 'win32':
 
 X_USERNAME = os.getenv("X_USERNAME", "")
 X_PASSWORD = os.getenv("X_PASSWORD", "")
-app = tweety.Twitter(str(Path(__file__).parent.parent / 'db' / 'x_session'))
+SESSION_PATH = Path(__file__).parent.parent / 'db' / 'x_session'
+
+# 匯入 tweety 很慢, 第一次 initialize 時才匯入並建立 app
+app = None
+Tweet = None
 initialized = False
+_login_lock = asyncio.Lock()  # 避免同時執行兩次登入
+
+
+def _new_app():
+    global Tweet
+    import tweety
+    from tweety.types.twDataTypes import Tweet
+    return tweety.Twitter(str(SESSION_PATH))
 
 
 class XAPI:
     async def initialize(self):
-        global initialized
-        if not initialized:
-            await app.start(X_USERNAME, X_PASSWORD)
-            initialized = True
+        """登入 X, 失敗時拋出例外, 下次呼叫會重試"""
+        global app, initialized
+        async with _login_lock:
+            if not initialized:
+                if app is None:
+                    app = _new_app()
+                await app.start(X_USERNAME, X_PASSWORD)
+                initialized = True
     
+    @metrics.api_call('x', 'get_user_info')
     async def get_new_user_info(self, username: str) -> dict[str, str]:
         """
         input:
@@ -40,10 +60,9 @@ class XAPI:
                 - 'icon_url': user's icon url
                 - 'description': user's description
         """
-        await self.initialize()
-        
         try:
-            user: User = await app.get_user_info(username)
+            await self.initialize()
+            user: 'User' = await app.get_user_info(username)
             return {
                 "title": user.name,
                 "icon_url": f"https://unavatar.io/twitter/{user.username}",
@@ -54,7 +73,8 @@ class XAPI:
             logger.error(f"Error in x_api.py: get_new_user_info: {e}")
             return {}
     
-    async def get_new_tweets(self, username: str, last_updated_str: str) -> tuple[list[str], list[dict[str, str]], str]:
+    @metrics.api_call('x', 'get_tweets')
+    async def get_new_tweets(self, username: str, last_updated_str: str) -> tuple[list[str], list[dict[str, str]], str, list[str]]:
         """
         取得使用者自上次更新後發布的所有新推文。
         
@@ -74,19 +94,18 @@ class XAPI:
                 - 'icon_url': 作者頭像 URL
                 - 'description': 作者個人簡介
             latest_time: 最新推文的發布時間 (ISO 格式)，如無新推文則為輸入的 last_updated_str
+            published_at: 每則新推文的發布時間 (ISO 格式)，順序同 urls
             
         Raises:
-            如有異常會被捕獲並記錄到日誌，函數會返回空列表、空字典和原始的 last_updated_str。
+            如有異常會被捕獲並記錄到日誌，函數會返回空列表、空字典、原始的 last_updated_str 和空列表。
         
         Example:
             ```python
-            urls, author_info, latest_time = await api.get_new_tweets('elonmusk', '2023-04-18T12:00:00+00:00')
+            urls, author_info, latest_time, published_at = await api.get_new_tweets('elonmusk', '2023-04-18T12:00:00+00:00')
             for url in urls:
                 print(f"發現新推文: {url}")
             ```
         """
-        await self.initialize()
-        
         def valid_tweet(tweet, last_updated: datetime) -> bool:
             if not isinstance(tweet, Tweet):
                 return False
@@ -96,8 +115,9 @@ class XAPI:
                 return False
             return True
         
-        global app
+        global app, initialized
         try:
+            await self.initialize()
             last_updated: datetime = datetime.fromisoformat(last_updated_str)
             tweets = await app.get_tweets(username)
             valid_tweets = [tweet for tweet in tweets.tweets if valid_tweet(tweet, last_updated)]
@@ -119,18 +139,20 @@ class XAPI:
             if valid_tweets:
                 last_updated_str = valid_tweets[-1].created_on.isoformat()
                 
-            return urls, author_info, last_updated_str
+            return urls, author_info, last_updated_str, [tweet.created_on.isoformat() for tweet in valid_tweets]
             
         except Exception as e:
             logger.error(f"Error in x_api.py: get_new_tweets: {e}")
             logger.error(f"error message: {str(e)}")
             
             # 清除舊的 session 檔案
-            if session_path := Path(__file__).parent.parent / 'db' / 'x_session':
+            if session_path := SESSION_PATH:
                 if session_path.exists():
                     session_path.unlink()
                     logger.info(f"Deleted session file: {session_path}")
-            app = tweety.Twitter(str(Path(__file__).parent.parent / 'db' / 'x_session'))
-            await app.start(X_USERNAME, X_PASSWORD)
+            # 下次呼叫 initialize 時以新的 session 重新登入
+            async with _login_lock:
+                app = None
+                initialized = False
             
-            return [], {}, last_updated_str
+            return [], {}, last_updated_str, []
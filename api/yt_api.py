@@ -1,16 +1,35 @@
 from datetime import datetime
 import os
 import logging
+import threading
 
-from googleapiclient.discovery import build
+from utils import metrics
 
 YT_API_KEY = os.getenv("YT_API_KEY", "")
+YT_POLL_TIMEOUT = float(os.getenv("YT_POLL_TIMEOUT", "60"))  # 單一 API 請求的 socket 逾時 (秒)
+
+build = None  # googleapiclient.discovery.build, 匯入很慢, 第一次建立 client 時才匯入
+Http = None  # httplib2.Http, 與 build 一起匯入
 
 logger = logging.getLogger('discord')
 
 class YoutubeAPI:
     def __init__(self):
-        self.youtube = build('youtube', 'v3', developerKey=YT_API_KEY)
+        self.local = threading.local()
+        
+    @property
+    def youtube(self):
+        """
+        httplib2 不是 thread-safe, 每個 thread 各自建立 client, 讓 cog 可以用 asyncio.to_thread 同時輪詢多個頻道
+        逾時設定在 HTTP 連線上, 逾時時 thread 會拋出 TimeoutError 結束, 不會在背景繼續佔用
+        """
+        global build, Http
+        if not hasattr(self.local, 'youtube'):
+            if build is None:
+                from googleapiclient.discovery import build
+                from httplib2 import Http
+            self.local.youtube = build('youtube', 'v3', developerKey=YT_API_KEY, http=Http(timeout=YT_POLL_TIMEOUT))
+        return self.local.youtube
         
     def analyze_data(self, data: dict, paths: list[str]):
         for path in paths:
@@ -56,7 +75,7 @@ class YoutubeAPI:
             user_id: 頻道 ID (格式如: UC...)
 
         消耗api:
-            - 使用 @用戶名: 2 配額
+            - 使用 @用戶名: 2 配額 (handle 查不到時改用搜尋, 共 102 配額)
             - 使用 頻道 ID: 1 配額
         
         返回:
@@ -70,27 +89,49 @@ class YoutubeAPI:
             }
         """
         if user_id is None:
-            user_id = self._username2userid(username)
+            user_id = self._handle2userid(username) or self._username2userid(username)
         if user_id is None:
             return {}
-        
-        request = self.youtube.channels().list(
-            part='id, snippet, contentDetails', 
-            id=user_id
-        )
+        # 最後的 channels.list 由 __get_channels_batch 記錄, handle 與搜尋各自記錄, 不重複計算
+        return self.get_channels_info([user_id]).get(user_id, {})
+    
+    def get_channels_info(self, user_ids: list[str]) -> dict[str, dict]:
+        """
+        批次查詢頻道資訊, 每次最多 50 個頻道
+        消耗api (頻道數 / 50 無條件進位)配額
+        output:
+            dict: 頻道 ID -> 同 get_channel_info 的頻道資訊, 找不到的頻道不會出現
+        """
+        infos = {}
+        for i in range(0, len(user_ids), 50):
+            for item in self.__get_channels_batch(user_ids[i:i + 50]):
+                infos[item['id']] = {
+                    'id': item['id'],
+                    'title': item['snippet']['title'],
+                    'icon_url': item['snippet']['thumbnails']['default']['url'],
+                    'uploads_id': item['contentDetails']['relatedPlaylists']['uploads'],
+                    'description': item['snippet']['description'],
+                }
+        return infos
+    
+    @metrics.api_call('yt', 'channels.list', quota=1)
+    def __get_channels_batch(self, user_ids: list[str]) -> list[dict]:
+        request = self.youtube.channels().list(part='id, snippet, contentDetails', id=','.join(user_ids))
+        response = request.execute()
+        return response.get('items', [])
+    
+    @metrics.api_call('yt', 'channels.list', quota=1)
+    def _handle2userid(self, username: str) -> str | None:
+        """
+        以 @handle 查詢頻道 ID, 消耗api 1配額
+        """
+        request = self.youtube.channels().list(part='id', forHandle=username)
         response = request.execute()
         if 'items' not in response or len(response['items']) == 0:
-            return {}
-        
-        response = response['items'][0]
-        return {
-            'id': response['id'],
-            'title': response['snippet']['title'],
-            'icon_url': response['snippet']['thumbnails']['default']['url'],
-            'uploads_id': response['contentDetails']['relatedPlaylists']['uploads'],
-            'description': response['snippet']['description'],
-        }
+            return None
+        return response['items'][0]['id']
     
+    @metrics.api_call('yt', 'search.list', quota=100)
     def _username2userid(self, username: str) -> str | None:
         """
         將 @用戶名 轉換為頻道 ID
@@ -106,6 +147,7 @@ class YoutubeAPI:
             return None
         return response['items'][0]['id']['channelId']
     
+    @metrics.api_call('yt', 'playlistItems.list', quota=1)
     def __get_video_list(self, uploads_id: str) -> dict:
         """
         消耗api 1配額
@@ -118,6 +160,26 @@ class YoutubeAPI:
         response = request.execute()
         return response['items']
     
+    def get_videos_info(self, video_ids: list[str]) -> dict[str, dict]:
+        """
+        批次查詢影片資訊, 每次最多 50 部
+        消耗api (影片數 / 50 無條件進位)配額
+        output:
+            dict: video_id -> 影片資訊, 已刪除或私人影片不會出現
+        """
+        infos = {}
+        for i in range(0, len(video_ids), 50):
+            for item in self.__get_videos_batch(video_ids[i:i + 50]):
+                infos[item['id']] = item
+        return infos
+    
+    @metrics.api_call('yt', 'videos.list', quota=1)
+    def __get_videos_batch(self, video_ids: list[str]) -> list[dict]:
+        request = self.youtube.videos().list(part='id, snippet, contentDetails, liveStreamingDetails', id=','.join(video_ids))
+        response = request.execute()
+        return response.get('items', [])
+    
+    @metrics.api_call('yt', 'videos.list', quota=1)
     def __get_video_info(self, video_id: str) -> dict:
         """
         消耗api 1配額
@@ -0,0 +1,147 @@
+"""
+DB 類別的 micro-benchmark, 以大量合成資料測量各個 public method 的執行時間
+
+- 依 --creators / --subs 建立內容創作者與 dc_yt_sub / dc_x_sub 訂閱 (可到百萬筆以上)
+- 訂閱寫入時會觸發 follower_cnt trigger, 寫入速度即 trigger 的成本
+- 每個 method 執行 --repeat 次, 輸出 mean / p50 / p95 / max (ms)
+- 預設使用暫存資料庫, --db 可指定路徑 (會清空該檔案)
+
+python -m benchmarks.db_methods --creators 2000 --subs 1000000 --json bench_output.json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from utils.db import DB
+
+BATCH_USERS = 10000  # 每次 executemany 寫入的 dc user 數量
+
+
+def stats(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'calls': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+        'max_ms': round(samples[-1] * 1000, 4),
+    }
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def populate(db: DB, creators: int, subs: int, users: int, rng: random.Random) -> dict[str, float]:
+    yt_cnt = creators // 2
+    conn = db._get_connection()
+    conn.executemany(
+        "INSERT INTO yt_users (username, id, title, icon_url, uploads_id, description, last_updated) VALUES (?, ?, ?, '', ?, '', '2024-01-01T00:00:00+00:00')",
+        [(f"yt{i}", f"UC{i}", f"channel {i}", f"UU{i}") for i in range(yt_cnt)]
+    )
+    conn.executemany(
+        "INSERT INTO x_users (username, title, icon_url, description, last_updated) VALUES (?, ?, '', '', '2024-01-01T00:00:00+00:00')",
+        [(f"x{i}", f"x user {i}") for i in range(creators - yt_cnt)]
+    )
+    conn.commit()
+
+    # 每個 dc user 平均訂閱 subs / users 個內容創作者, 不重複
+    per_user, extra = divmod(subs, users)
+    rows = 0
+    start = time.perf_counter()
+    for first in range(0, users, BATCH_USERS):
+        yt_rows, x_rows = [], []
+        for user in range(first, min(users, first + BATCH_USERS)):
+            k = min(creators, per_user + (user < extra))
+            for creator in rng.sample(range(creators), k):
+                if creator < yt_cnt:
+                    yt_rows.append((str(user + 1), f"yt{creator}"))
+                else:
+                    x_rows.append((str(user + 1), f"x{creator - yt_cnt}"))
+        conn.executemany("INSERT INTO dc_yt_sub (dc_id, yt_username) VALUES (?, ?)", yt_rows)
+        conn.executemany("INSERT INTO dc_x_sub (dc_id, x_username) VALUES (?, ?)", x_rows)
+        conn.commit()
+        rows += len(yt_rows) + len(x_rows)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return {'rows': rows, 'seconds': round(elapsed, 4), 'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0}
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    db_path = args.db or str(Path(tempfile.mkdtemp()) / 'bench.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    db = DB.create_db(db_path)
+    users = args.users or max(1, args.subs // 20)
+    result = {
+        'sqlite_version': sqlite3.sqlite_version,
+        'creators': args.creators,
+        'subs': args.subs,
+        'users': users,
+        'repeat': args.repeat,
+        'populate_subs_with_triggers': populate(db, args.creators, args.subs, users, rng),
+        'methods': {},
+    }
+    methods = result['methods']
+    yt_cnt = args.creators // 2
+    yt_names = [f"yt{i}" for i in range(yt_cnt)]
+    x_names = [f"x{i}" for i in range(args.creators - yt_cnt)]
+    dc_ids = [str(rng.randrange(users) + 1) for _ in range(args.repeat)]
+
+    methods['get_followers'] = stats([timed(db.get_followers, 'yt', rng.choice(yt_names)) for _ in range(args.repeat)])
+    methods['get_dc_user_subs'] = stats([timed(db.get_dc_user_subs, dc_id) for dc_id in dc_ids])
+    methods['get_dc_user_sub_view'] = stats([timed(db.get_dc_user_sub_view, dc_id) for dc_id in dc_ids])
+    methods['get_yt_users'] = stats([timed(db.get_yt_users) for _ in range(args.repeat)])
+    methods['update_yt_users'] = stats([
+        timed(db.update_yt_users, {username: {'last_updated': f"2024-01-02T00:00:{i % 60:02d}+00:00"} for username in rng.sample(yt_names, min(50, yt_cnt))})
+        for i in range(args.repeat)
+    ])
+
+    # follower_cnt trigger: 同一個 dc user 訂閱後再取消訂閱 10 個內容創作者
+    new_dc_ids = [f"bench{i}" for i in range(args.repeat)]
+    picks = [(rng.sample(yt_names, min(5, yt_cnt)), rng.sample(x_names, min(5, len(x_names)))) for _ in new_dc_ids]
+    methods['add_dc_user_subs'] = stats([timed(db.add_dc_user_subs, dc_id, yt, x) for dc_id, (yt, x) in zip(new_dc_ids, picks)])
+    methods['del_dc_user_subs'] = stats([timed(db.del_dc_user_subs, dc_id, yt, x) for dc_id, (yt, x) in zip(new_dc_ids, picks)])
+
+    methods['enqueue_notifications'] = stats([
+        timed(db.enqueue_notifications, 'yt', {username: {'last_updated': '2024-01-03T00:00:00+00:00'}}, [(username, f"video{i}", {'content': f"video{i}"})])
+        for i, username in enumerate(rng.choice(yt_names) for _ in range(args.repeat))
+    ])
+
+    # 最後刪除內容創作者, ON DELETE CASCADE 會一併刪除所有訂閱
+    deleted = rng.sample(yt_names, min(args.repeat, yt_cnt))
+    methods['del_yt_users_cascade'] = stats([timed(db.del_yt_users, [username]) for username in deleted])
+
+    if not args.db:
+        os.remove(db_path)
+        os.rmdir(os.path.dirname(db_path))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--creators', type=int, default=1000)
+    parser.add_argument('--subs', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=0, help='dc user 數量, 預設為 subs / 20')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--db', type=str, default='', help='資料庫路徑, 預設使用暫存檔')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=str, default='', help='將結果寫入 json 檔')
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
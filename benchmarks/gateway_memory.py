@@ -0,0 +1,136 @@
+"""
+比較 full 與 lean gateway 設定在伺服器人數增加時的記憶體用量
+
+把合成的 gateway 事件直接交給 discord.py 的 ConnectionState 解析, 依照 intent 決定事件是否會收到:
+- GUILD_CREATE: 有 members intent 時包含所有成員 (等同 chunk 完成), presences intent 時包含上線狀態
+- MESSAGE_CREATE: 有 guild_messages intent 時才會收到, 進入訊息快取
+以 tracemalloc 測量每種設定, 每種伺服器人數下快取所佔的記憶體
+
+python -m benchmarks.gateway_memory --members 1000,10000,50000 --messages 2000 --json bench_output.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+from pathlib import Path
+import tracemalloc
+
+from bot import create_bot
+
+TIMESTAMP = '2024-01-01T00:00:00+00:00'
+CHANNELS = 5
+
+
+def user_payload(user_id: int) -> dict:
+    return {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0', 'global_name': None, 'avatar': None}
+
+
+def member_payload(user_id: int) -> dict:
+    return {'user': user_payload(user_id), 'roles': [], 'joined_at': TIMESTAMP, 'deaf': False, 'mute': False, 'flags': 0}
+
+
+def guild_payload(guild_id: int, members: int, include_members: bool, include_presences: bool) -> dict:
+    first_user = guild_id * 10 ** 6
+    return {
+        'id': str(guild_id),
+        'name': f"guild {guild_id}",
+        'icon': None,
+        'owner_id': str(first_user),
+        'member_count': members,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [
+            {'id': str(guild_id + i + 1), 'type': 0, 'name': f"channel{i}", 'position': i, 'permission_overwrites': [], 'guild_id': str(guild_id)}
+            for i in range(CHANNELS)
+        ],
+        'members': [member_payload(first_user + i) for i in range(members)] if include_members else [],
+        'presences': [
+            {'user': {'id': str(first_user + i)}, 'status': 'online', 'activities': [], 'client_status': {'desktop': 'online'}}
+            for i in range(members)
+        ] if include_presences else [],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'threads': [],
+        'voice_states': [],
+        'stage_instances': [],
+        'guild_scheduled_events': [],
+    }
+
+
+def message_payload(message_id: int, guild_id: int, user_id: int) -> dict:
+    return {
+        'id': str(message_id),
+        'channel_id': str(guild_id + message_id % CHANNELS + 1),
+        'guild_id': str(guild_id),
+        'author': user_payload(user_id),
+        'member': {'roles': [], 'joined_at': TIMESTAMP, 'deaf': False, 'mute': False, 'flags': 0},
+        'content': 'hello world ' * 5,
+        'timestamp': TIMESTAMP,
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0,
+    }
+
+
+async def measure(profile: str, members: int, messages: int) -> dict:
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    bot = create_bot(profile)
+    # async with 會設定 bot.loop (dispatch 事件時需要) 與 AutoShardedBot close 時用到的佇列
+    # 建立與關閉對稱, 不需要 login 或連線 gateway
+    async with bot:
+        state = bot._connection
+        intents = bot.intents
+        guild_id = 10 ** 12
+        state._add_guild_from_data(guild_payload(guild_id, members, intents.members, intents.presences))
+        if intents.guild_messages:
+            first_user = guild_id * 10 ** 6
+            for i in range(messages):
+                state.parse_message_create(message_payload(i + 1, guild_id, first_user + i % max(1, members)))
+        await asyncio.sleep(0)  # 讓 on_message 等事件執行完
+
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        guild = bot.get_guild(guild_id)
+        result = {
+            'profile': profile,
+            'members': members,
+            'cached_members': len(guild.members) if guild else 0,
+            'cached_messages': len(bot.cached_messages),
+            'memory_mb': round(used / 1024 / 1024, 2),
+        }
+    return result
+
+
+async def run(args) -> list[dict]:
+    tracemalloc.start()
+    results = []
+    for members in args.members:
+        for profile in ('full', 'lean'):
+            results.append(await measure(profile, members, args.messages))
+            print(results[-1])
+    tracemalloc.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--members', type=lambda value: [int(v) for v in value.split(',')], default=[1000, 10000, 50000], help='以逗號分隔的伺服器人數')
+    parser.add_argument('--messages', type=int, default=2000, help='有 guild_messages intent 時收到的訊息數')
+    parser.add_argument('--json', type=str, default='', help='將結果寫入 json 檔')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
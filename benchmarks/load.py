@@ -0,0 +1,346 @@
+"""
+端對端負載測試: 以本地的假 YouTube API, 假 tweety app 與假 Discord 傳送取代外部服務,
+產生大量新影片 / 新推文, 直接執行真正的 Youtube, X, Delivery cog
+
+輸出:
+- 通知延遲 (假服務發布內容 -> 假 Discord 收到訊息) 的 p50 / p95 / p99
+- 每輪的 API 呼叫次數, DB 時間, 執行時間
+- 記憶體峰值 (tracemalloc)
+
+python -m benchmarks.load --creators 500 --subs 50000 --cycles 5 --json bench_output.json
+"""
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+# 必須在匯入專案模組前設定
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DB_PATH"] = str(Path(_tmp.name) / 'bench.db')
+os.environ.setdefault("METRICS_PORT", "1")  # 只用來收集 DB 時間, 不會啟動 metrics server
+
+import discord
+from discord.ext import commands
+
+import api.x_api as x_api_module
+import api.yt_api as yt_api_module
+from utils import DB, PollScheduler, metrics
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class World:
+    """假 YouTube 與 X 的資料"""
+    def __init__(self, rng: random.Random, api_latency: float):
+        self.rng = rng
+        self.api_latency = api_latency
+        self.videos: dict[str, list[dict]] = {}  # uploads_id -> 影片 (新的在前)
+        self.video_info: dict[str, dict] = {}  # video_id -> videos.list 的 item
+        self.channels: dict[str, dict] = {}  # channel_id -> channels.list 的 item
+        self.tweets: dict[str, list['FakeTweet']] = {}  # username -> 推文 (新的在前)
+        self.published: dict[str, float] = {}  # item id -> 發布時間 (time.time)
+        self.api_calls = Counter()
+        self.seq = 0
+
+    def add_channel(self, channel_id: str, title: str):
+        uploads_id = 'UU' + channel_id
+        self.channels[channel_id] = {
+            'id': channel_id,
+            'snippet': {'title': title, 'description': '', 'thumbnails': {'default': {'url': 'https://example.com/icon.png'}}},
+            'contentDetails': {'relatedPlaylists': {'uploads': uploads_id}},
+        }
+        self.videos[uploads_id] = []
+        return uploads_id
+
+    def add_x_user(self, username: str):
+        self.tweets[username] = [FakeTweet(username, f"{username}-old", datetime.now(timezone.utc) - timedelta(days=1))]
+
+    def burst(self, fraction: float):
+        """部分頻道上傳新影片, 部分 X 使用者發布新推文"""
+        now = datetime.now(timezone.utc)
+        for channel_id, channel in self.channels.items():
+            if self.rng.random() >= fraction:
+                continue
+            self.seq += 1
+            video_id = f"v{self.seq}"
+            self.videos[channel['contentDetails']['relatedPlaylists']['uploads']].insert(0, {
+                'snippet': {'publishedAt': now.isoformat()},
+                'contentDetails': {'videoId': video_id},
+            })
+            self.video_info[video_id] = {
+                'id': video_id,
+                'snippet': {
+                    'title': f"video {video_id}",
+                    'channelId': channel_id,
+                    'channelTitle': channel['snippet']['title'],
+                    'publishedAt': now.isoformat(),
+                    'liveBroadcastContent': 'none',
+                    'thumbnails': {'standard': {'url': 'https://example.com/thumb.png'}},
+                },
+                'contentDetails': {'duration': 'PT10M'},
+            }
+            self.published[video_id] = time.time()
+        for username, tweets in self.tweets.items():
+            if self.rng.random() >= fraction:
+                continue
+            self.seq += 1
+            tweet = FakeTweet(username, str(self.seq), now)
+            tweets.insert(0, tweet)
+            self.published[tweet.url] = time.time()
+
+
+class FakeRequest:
+    def __init__(self, world: World, method: str, func):
+        self.world = world
+        self.method = method
+        self.func = func
+
+    def execute(self):
+        time.sleep(self.world.api_latency)
+        self.world.api_calls[f"yt.{self.method}"] += 1
+        return self.func()
+
+
+class FakeResource:
+    def __init__(self, world: World, method: str, func):
+        self.world = world
+        self.method = method
+        self.func = func
+
+    def list(self, **kwargs):
+        return FakeRequest(self.world, self.method, lambda: self.func(**kwargs))
+
+
+class FakeYoutube:
+    """googleapiclient youtube v3 resource 中 bot 會用到的部分"""
+    def __init__(self, world: World):
+        self.world = world
+
+    def playlistItems(self):
+        return FakeResource(self.world, 'playlistItems.list', lambda playlistId, maxResults=50, **_: {'items': self.world.videos[playlistId][:maxResults]})
+
+    def videos(self):
+        return FakeResource(self.world, 'videos.list', lambda id, **_: {'items': [self.world.video_info[video_id] for video_id in id.split(',') if video_id in self.world.video_info]})
+
+    def channels(self):
+        return FakeResource(self.world, 'channels.list', lambda id, **_: {'items': [self.world.channels[id]] if id in self.world.channels else []})
+
+    def search(self):
+        return FakeResource(self.world, 'search.list', lambda q, **_: {'items': []})
+
+
+class FakeTweet:
+    def __init__(self, username: str, tweet_id: str, created_on: datetime):
+        self.id = tweet_id
+        self.is_retweet = False
+        self.created_on = created_on
+        self.url = f"https://x.com/{username}/status/{tweet_id}"
+        self.author = SimpleNamespace(name=username, profile_image_url_https='https://example.com/icon.png', description='')
+
+
+class FakeTweets:
+    def __init__(self, tweets: list[FakeTweet]):
+        self.tweets = tweets
+
+    def __getitem__(self, index):
+        return self.tweets[index]
+
+    def __len__(self):
+        return len(self.tweets)
+
+
+class FakeTwitter:
+    """tweety.Twitter 中 bot 會用到的部分"""
+    def __init__(self, world: World):
+        self.world = world
+
+    async def start(self, username: str, password: str):
+        pass
+
+    async def get_tweets(self, username: str) -> FakeTweets:
+        await asyncio.sleep(self.world.api_latency)
+        self.world.api_calls['x.get_tweets'] += 1
+        return FakeTweets(self.world.tweets[username][:20])
+
+    async def get_user_info(self, username: str):
+        await asyncio.sleep(self.world.api_latency)
+        self.world.api_calls['x.get_user_info'] += 1
+        return SimpleNamespace(name=username, username=username, description='')
+
+
+class FakeDiscord:
+    """取代 Discord 的傳送路徑, 記錄每則通知的延遲"""
+    def __init__(self, world: World, send_latency: float):
+        self.world = world
+        self.send_latency = send_latency
+        self.latencies: list[float] = []
+        self.messages = 0
+
+    def channel(self, channel_id: int, **kwargs):
+        return SimpleNamespace(id=channel_id, send=self.send)
+
+    async def send(self, content: str | None=None, embeds: list[discord.Embed]=[], **kwargs):
+        await asyncio.sleep(self.send_latency)
+        self.messages += 1
+        if embeds:
+            item = embeds[0].url.rsplit('=', 1)[-1]
+        else:
+            item = content.splitlines()[-1]
+        if item in self.world.published:
+            self.latencies.append(time.time() - self.world.published[item])
+
+    async def fetch_user(self, user_id: int):
+        async def create_dm():
+            return SimpleNamespace(id=user_id + 10 ** 12)
+        return SimpleNamespace(id=user_id, dm_channel=None, create_dm=create_dm)
+
+
+def populate(db: DB, world: World, creators: int, subs: int, users: int):
+    now = datetime.now(timezone.utc).isoformat()
+    conn = db._get_connection()
+    yt_cnt = creators // 2
+    for i in range(yt_cnt):
+        uploads_id = world.add_channel(f"UC{i}", f"channel {i}")
+        conn.execute(
+            "INSERT INTO yt_users (username, id, title, icon_url, uploads_id, description, last_updated) VALUES (?, ?, ?, '', ?, '', ?)",
+            (f"yt{i}", f"UC{i}", f"channel {i}", uploads_id, now)
+        )
+    for i in range(creators - yt_cnt):
+        world.add_x_user(f"x{i}")
+        conn.execute(
+            "INSERT INTO x_users (username, title, icon_url, description, last_updated) VALUES (?, ?, '', '', ?)",
+            (f"x{i}", f"x user {i}", now)
+        )
+    rows = set()
+    while len(rows) < subs:
+        rows.add((str(world.rng.randrange(users) + 1), world.rng.randrange(creators)))
+    conn.executemany(
+        "INSERT INTO dc_yt_sub (dc_id, yt_username) VALUES (?, ?)",
+        [(dc_id, f"yt{i}") for dc_id, i in rows if i < yt_cnt]
+    )
+    conn.executemany(
+        "INSERT INTO dc_x_sub (dc_id, x_username) VALUES (?, ?)",
+        [(dc_id, f"x{i - yt_cnt}") for dc_id, i in rows if i >= yt_cnt]
+    )
+    conn.commit()
+    conn.close()
+
+
+def db_seconds() -> float:
+    return sum(total for _, total, _ in metrics.DB_QUERY_SECONDS.values.values())
+
+
+async def run(args) -> dict:
+    world = World(random.Random(args.seed), args.api_latency)
+    fake_discord = FakeDiscord(world, args.send_latency)
+
+    yt_api_module.build = lambda *_, **__: FakeYoutube(world)
+    yt_api_module.Http = lambda **_: None
+    x_api_module.app = FakeTwitter(world)
+    x_api_module.Tweet = FakeTweet
+    x_api_module.initialized = False
+
+    db = DB.create_db()
+    populate(db, world, args.creators, args.subs, args.users)
+
+    bot = commands.Bot(command_prefix='&', intents=discord.Intents.none())
+    bot._connection.user = SimpleNamespace(name='bench', avatar=SimpleNamespace(url='https://example.com/bot.png'))
+    bot.get_user = lambda user_id: None
+    bot.fetch_user = fake_discord.fetch_user
+    bot.get_partial_messageable = fake_discord.channel
+
+    from cogs.delivery import Delivery
+    from cogs.x import X
+    from cogs.yt import Youtube
+
+    yt = Youtube(bot)
+    # 停止 __init__ 啟動的所有 task loop, 之後直接呼叫 loop 的本體
+    await yt.cog_unload()
+    x = X(bot)
+    await x.x_api.initialize()
+    delivery = Delivery(bot)
+
+    yt_keys = list(db.get_yt_users().keys())
+    x_cnt = len(db.get_x_users())
+    yt.poll_schedule = PollScheduler(args.period)
+    yt.poll_schedule.due(yt_keys)
+
+    tracemalloc.start()
+    cycles = []
+    for cycle in range(args.cycles):
+        world.burst(args.burst)
+        calls_before = sum(world.api_calls.values())
+        db_before = db_seconds()
+        start = time.perf_counter()
+
+        # 讓所有 YT 頻道到期, 並讓 X 輪完一圈, 模擬一個完整的輪詢週期
+        for key in yt.poll_schedule.next_due:
+            yt.poll_schedule.next_due[key] = 0
+        await yt.update_new_video()
+        for _ in range(x_cnt):
+            await x.update_new_tweets()
+        poll_seconds = time.perf_counter() - start
+        await delivery.deliver()
+
+        cycles.append({
+            'cycle': cycle,
+            'api_calls': sum(world.api_calls.values()) - calls_before,
+            'db_seconds': round(db_seconds() - db_before, 4),
+            'poll_seconds': round(poll_seconds, 4),
+            'total_seconds': round(time.perf_counter() - start, 4),
+        })
+        print(cycles[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'creators': args.creators,
+        'subs': args.subs,
+        'messages': fake_discord.messages,
+        'latency_p50': round(percentile(fake_discord.latencies, 50), 4),
+        'latency_p95': round(percentile(fake_discord.latencies, 95), 4),
+        'latency_p99': round(percentile(fake_discord.latencies, 99), 4),
+        'api_calls_per_cycle': sum(c['api_calls'] for c in cycles) / len(cycles),
+        'api_calls_by_method': dict(world.api_calls),
+        'db_seconds_per_cycle': round(sum(c['db_seconds'] for c in cycles) / len(cycles), 4),
+        'peak_memory_mb': round(peak / 1024 / 1024, 2),
+        'cycles': cycles,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--creators', type=int, default=500)
+    parser.add_argument('--subs', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=20000, help='dc user 數量')
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--burst', type=float, default=0.2, help='每輪有新內容的內容創作者比例')
+    parser.add_argument('--period', type=float, default=300)
+    parser.add_argument('--api-latency', type=float, default=0.005, help='假 API 每次呼叫的延遲 (秒)')
+    parser.add_argument('--send-latency', type=float, default=0.0005, help='假 Discord 每次傳送的延遲 (秒)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=str, default='', help='將結果寫入 json 檔')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    summary = {key: value for key, value in result.items() if key != 'cycles'}
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
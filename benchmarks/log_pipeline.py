@@ -0,0 +1,99 @@
+"""
+比較直接寫檔與經過 QueueHandler / QueueListener 時, 呼叫端每筆 log 的成本
+
+呼叫端的時間就是事件迴圈被 log 佔用的時間, 背景執行緒寫完剩餘佇列的時間另外列出
+本機磁碟的寫入有緩衝, 兩者差異不大; --write-latency 模擬較慢的磁碟 (網路磁碟, 磁碟忙碌) 每次寫入的延遲
+
+python -m benchmarks.log_pipeline --records 20000 --write-latency 0.0002 --json bench_output.json
+"""
+import argparse
+import json
+import logging
+from logging.handlers import TimedRotatingFileHandler
+from pathlib import Path
+import tempfile
+import time
+
+from utils import log
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class SlowFileHandler(TimedRotatingFileHandler):
+    """每次寫入額外等待 write_latency 秒"""
+    def __init__(self, *args, write_latency: float=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_latency = write_latency
+
+    def flush(self):
+        super().flush()
+        if self.write_latency:
+            time.sleep(self.write_latency)
+
+
+def run_case(name: str, path: Path, records: int, queued: bool, fmt: str, write_latency: float) -> dict:
+    logger_name = f"bench.{name}"
+    logger = logging.getLogger(logger_name)
+    logger.propagate = False
+    handler = SlowFileHandler(filename=path / f"{name}.log", when='midnight', encoding='utf-8', write_latency=write_latency)
+    listener = None
+    if queued:
+        listener = log.setup_queue_logging(handler, fmt=fmt, level='DEBUG', levels='', logger_name=logger_name)
+    else:
+        handler.setFormatter(log.get_formatter(fmt))
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+
+    samples = []
+    start = time.perf_counter()
+    for i in range(records):
+        t = time.perf_counter()
+        logger.debug("gateway event %s seq=%d guild=%d", 'MESSAGE_CREATE', i, i % 1000)
+        samples.append(time.perf_counter() - t)
+    caller_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drain_seconds = time.perf_counter() - start
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    handler.close()
+
+    return {
+        'case': name,
+        'write_latency': write_latency,
+        'caller_us_per_record': round(caller_seconds / records * 1e6, 3),
+        'caller_p99_us': round(percentile(samples, 99) * 1e6, 3),
+        'caller_max_us': round(max(samples) * 1e6, 3),
+        'drain_seconds': round(drain_seconds, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--write-latency', type=float, default=0.0002, help='模擬慢速磁碟每次寫入的延遲 (秒)')
+    parser.add_argument('--json', type=str, default='', help='將結果寫入 json 檔')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for write_latency in sorted({0.0, args.write_latency}):
+            for name, queued, fmt in [
+                ('direct_text', False, 'text'),
+                ('queued_text', True, 'text'),
+                ('queued_json', True, 'json'),
+            ]:
+                results.append(run_case(name, Path(tmp), args.records, queued, fmt, write_latency))
+                print(results[-1])
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+模擬 YouTube 輪詢排程的請求分布
+
+比較舊的做法 (每 period 秒一次把所有頻道輪詢完) 與 PollScheduler 平均分散的排程,
+輸出每個 tick 的請求數峰值與平均值
+
+--restart-at 在指定秒數模擬重啟 (停機 --downtime 秒), 比較沒有 checkpoint 與還原 checkpoint 時
+重啟後的請求數峰值, 以及每個頻道兩次輪詢之間最長的間隔
+
+python -m benchmarks.poll_schedule --creators 500 --period 300 --tick 15 --hours 2 --restart-at 3600 --downtime 120
+"""
+import argparse
+from collections import Counter
+
+from utils.scheduler import PollScheduler
+
+
+def simulate_burst(creators: int, period: float, tick: float, duration: float) -> Counter:
+    requests = Counter()
+    now = 0.0
+    while now < duration:
+        if now % period == 0:
+            requests[now] += creators
+        now += tick
+    return requests
+
+
+def simulate_scheduler(creators: int, period: float, tick: float, duration: float, jitter: float) -> Counter:
+    schedule = PollScheduler(period, jitter, salt='yt')
+    keys = [f"creator{i}" for i in range(creators)]
+    requests = Counter()
+    now = 0.0
+    while now < duration:
+        requests[now] += len(schedule.due(keys, now))
+        now += tick
+    return requests
+
+
+def simulate_restart(creators: int, period: float, tick: float, duration: float, jitter: float, restart_at: float, downtime: float, checkpoint: bool) -> tuple[Counter, float]:
+    """重啟前最後一個 tick 到期的頻道視為輪詢到一半被中斷, return: (每個 tick 的請求數, 重啟後的最長輪詢間隔)"""
+    schedule = PollScheduler(period, jitter, salt='yt')
+    keys = [f"creator{i}" for i in range(creators)]
+    requests = Counter()
+    last_polled: dict[str, float] = {}
+    max_gap = 0.0
+    now = 0.0
+    while now < duration:
+        if restart_at <= now < restart_at + downtime:
+            now += tick
+            continue
+        if now >= restart_at and restart_at >= 0:
+            state = schedule.checkpoint()
+            schedule = PollScheduler(period, jitter, salt='yt')
+            if checkpoint:
+                schedule.restore(state, now)
+            restart_at = -1
+        due = schedule.due(keys, now)
+        requests[now] += len(due)
+        for key in due:
+            if restart_at < 0 and key in last_polled:
+                max_gap = max(max_gap, now - last_polled[key])
+            last_polled[key] = now
+            if restart_at < 0 or now + tick < restart_at:
+                schedule.finish(key)
+        now += tick
+    return requests, max_gap
+
+
+def report(name: str, requests: Counter, creators: int, period: float, tick: float, duration: float, warmup: float):
+    counts = [cnt for t, cnt in requests.items() if t >= warmup]
+    ticks = int((duration - warmup) // tick)
+    total = sum(counts)
+    print(f"{name:<10} peak/tick={max(counts, default=0):>6} "
+          f"mean/tick={total / ticks:>8.2f} "
+          f"ideal/tick={creators * tick / period:>8.2f} "
+          f"polls={total}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--creators', type=int, default=500)
+    parser.add_argument('--period', type=float, default=300)
+    parser.add_argument('--tick', type=float, default=15)
+    parser.add_argument('--hours', type=float, default=2)
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--restart-at', type=float, default=-1, help='模擬重啟的秒數, 預設不模擬')
+    parser.add_argument('--downtime', type=float, default=120, help='重啟時停機的秒數')
+    args = parser.parse_args()
+
+    duration = args.hours * 60 * 60
+    # 排程第一次出現的 key 要等到下一個時段, 略過第一個週期
+    warmup = args.period
+    report('burst', simulate_burst(args.creators, args.period, args.tick, duration), args.creators, args.period, args.tick, duration, warmup)
+    report('scheduler', simulate_scheduler(args.creators, args.period, args.tick, duration, args.jitter), args.creators, args.period, args.tick, duration, warmup)
+    if args.restart_at >= 0:
+        for name, checkpoint in [('restart', False), ('checkpoint', True)]:
+            requests, max_gap = simulate_restart(
+                args.creators, args.period, args.tick, duration, args.jitter, args.restart_at, args.downtime, checkpoint
+            )
+            report(name, requests, args.creators, args.period, args.tick, duration, warmup)
+            print(f"{'':<10} max gap after restart={max_gap:.0f}s (period={args.period:.0f}s, downtime={args.downtime:.0f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+比較 FTS5 全文搜尋 (DB.search_creators) 與直接以 LIKE 掃描 yt_users / x_users 的查詢時間
+
+python -m benchmarks.search --creators 10000 --queries 200
+"""
+import argparse
+import random
+import sqlite3
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from utils.db import DB
+
+
+def populate(db: DB, creators: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(5000)]
+    conn = db._get_connection()
+    conn.executemany(
+        "INSERT INTO yt_users (username, id, title, icon_url, uploads_id, description, follower_cnt, last_updated) VALUES (?, ?, ?, '', '', ?, ?, '')",
+        [(f"yt{i}", f"UC{i}", ' '.join(rng.choices(words, k=3)), ' '.join(rng.choices(words, k=30)), rng.randint(0, 1000)) for i in range(creators // 2)]
+    )
+    conn.executemany(
+        "INSERT INTO x_users (username, title, icon_url, description, follower_cnt, last_updated) VALUES (?, ?, '', ?, ?, '')",
+        [(f"x{i}", ' '.join(rng.choices(words, k=3)), ' '.join(rng.choices(words, k=30)), rng.randint(0, 1000)) for i in range(creators - creators // 2)]
+    )
+    conn.commit()
+    conn.close()
+    return words
+
+
+def like_search(db: DB, query: str, limit: int) -> list[tuple[str, str]]:
+    conn = sqlite3.connect(db.db_path)
+    pattern = f"%{query}%"
+    rows = conn.execute("""
+        SELECT platform, username FROM (
+            SELECT 'yt' AS platform, username, follower_cnt FROM yt_users
+            WHERE username LIKE ? OR title LIKE ? OR description LIKE ?
+            UNION ALL
+            SELECT 'x' AS platform, username, follower_cnt FROM x_users
+            WHERE username LIKE ? OR title LIKE ? OR description LIKE ?
+        ) ORDER BY follower_cnt DESC LIMIT ?
+    """, (pattern,) * 6 + (limit,)).fetchall()
+    conn.close()
+    return rows
+
+
+def bench(name: str, func, queries: list[str]):
+    start = time.perf_counter()
+    hits = sum(len(func(query)) for query in queries)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<6} {elapsed / len(queries) * 1000:>8.3f} ms/query  hits={hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--creators', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB.create_db(str(Path(tmp) / 'bench.db'))
+        start = time.perf_counter()
+        words = populate(db, args.creators, args.seed)
+        print(f"populate {args.creators} creators: {time.perf_counter() - start:.2f}s")
+
+        rng = random.Random(args.seed + 1)
+        queries = [rng.choice(words)[:rng.randint(3, 6)] for _ in range(args.queries)]
+        bench('fts5', lambda query: db.search_creators(query, limit=10), queries)
+        bench('like', lambda query: like_search(db, query, limit=10), queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+啟動時間測試, 需要在新的程序中執行才能量到真正的匯入時間
+
+- 匯入所有 cog 的時間, 以及匯入後是否已經載入 tweety / googleapiclient
+- create_db 第一次與之後呼叫的時間
+- 載入所有 extension 的時間 (= 可以開始連線 gateway 的時間), X 登入以 --login-latency 模擬
+- 收到 READY 之後, X 在背景完成登入的時間
+- 最後另外量 tweety / googleapiclient 本身的匯入時間作為參考
+
+python -m benchmarks.startup --login-latency 3 --json bench_output.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DB_PATH"] = str(Path(_tmp.name) / 'bench.db')
+
+EXTENSIONS = ['main', 'x', 'yt', 'delivery']
+HEAVY_MODULES = ['tweety', 'googleapiclient.discovery']
+
+
+class FakeTwitter:
+    def __init__(self, login_latency: float):
+        self.login_latency = login_latency
+
+    async def start(self, username: str, password: str):
+        await asyncio.sleep(self.login_latency)
+
+
+def import_seconds(module: str) -> float | None:
+    start = time.perf_counter()
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return None
+    return round(time.perf_counter() - start, 4)
+
+
+async def run(args) -> dict:
+    result = {}
+
+    start = time.perf_counter()
+    import discord
+    from discord.ext import commands
+    result['import_discord_seconds'] = round(time.perf_counter() - start, 4)
+
+    start = time.perf_counter()
+    for name in EXTENSIONS:
+        importlib.import_module(f"cogs.{name}")
+    result['import_cogs_seconds'] = round(time.perf_counter() - start, 4)
+    result['heavy_modules_loaded_by_cogs'] = [module for module in HEAVY_MODULES if module in sys.modules]
+
+    from utils import DB
+    start = time.perf_counter()
+    DB.create_db()
+    result['create_db_first_seconds'] = round(time.perf_counter() - start, 4)
+    start = time.perf_counter()
+    for _ in range(len(EXTENSIONS)):
+        DB.create_db()
+    result['create_db_repeat_seconds'] = round(time.perf_counter() - start, 4)
+
+    import api.x_api as x_api_module
+    x_api_module.app = FakeTwitter(args.login_latency)
+
+    bot = commands.Bot(command_prefix='&', intents=discord.Intents.default())
+    async with bot:
+        start = time.perf_counter()
+        await asyncio.gather(*(bot.load_extension(f"cogs.{name}") for name in EXTENSIONS))
+        result['load_extensions_seconds'] = round(time.perf_counter() - start, 4)
+
+        # 模擬 gateway 的 READY, 量 X 在背景完成登入的時間
+        start = time.perf_counter()
+        bot._ready.set()
+        while not x_api_module.initialized:
+            await asyncio.sleep(0.01)
+        result['x_login_after_ready_seconds'] = round(time.perf_counter() - start, 4)
+
+        for name in EXTENSIONS:
+            await bot.unload_extension(f"cogs.{name}")
+
+    for module in HEAVY_MODULES:
+        result[f"import_{module}_seconds"] = import_seconds(module)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--login-latency', type=float, default=3.0, help='模擬 X 登入所需的秒數')
+    parser.add_argument('--json', type=str, default='', help='將結果寫入 json 檔')
+    args = parser.parse_args()
+
+    process_start = time.perf_counter()
+    result = asyncio.run(run(args))
+    result['total_seconds'] = round(time.perf_counter() - process_start, 4)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
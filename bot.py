@@ -1,17 +1,69 @@
 import asyncio
-import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueListener, TimedRotatingFileHandler
 import os
 from pathlib import Path
 
 import discord
 from discord.ext import commands
 
+from utils import log, metrics, profiling
+
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
-bot = commands.Bot(command_prefix = '&', intents = discord.Intents.all())
+GATEWAY_PROFILE = os.getenv("GATEWAY_PROFILE", "lean")  # lean or full
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None  # 所有程序合計的 shard 數量, 不設定時使用 Discord 建議的數量
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(',') if shard_id.strip()] or None  # 此程序負責的 shard, 例如 0,1, 不設定時為全部
+BOT_MODE = os.getenv("BOT_MODE", "all")  # all, gateway (指令與通知傳送) or poller (只輪詢 API)
+EXTENSIONS = {
+    'all': ['main', 'x', 'yt', 'delivery'],
+    'gateway': ['main', 'delivery'],
+    'poller': ['x', 'yt'],
+}
+
+
+def create_bot(profile: str=GATEWAY_PROFILE, shard_count: int | None=SHARD_COUNT, shard_ids: list[int] | None=SHARD_IDS) -> commands.AutoShardedBot:
+    """
+    lean: 只訂閱 guilds intent, 不快取成員與訊息, 記憶體不會隨伺服器人數增加
+          bot 只需要斜線指令與私訊, 使用者改由 UserResolver 按需 fetch
+    full: 所有 intent 與預設快取
+
+    每個 shard 各自連線 gateway, 伺服器數量多時可以用 SHARD_IDS 分給多個程序
+    私訊與廣播頻道都透過 REST 傳送, 和伺服器在哪個 shard 無關
+    """
+    if shard_ids is not None and shard_count is None:
+        raise ValueError("設定 SHARD_IDS 時必須同時設定 SHARD_COUNT")
+    shard_options = {'shard_count': shard_count, 'shard_ids': shard_ids}
+
+    if profile == 'full':
+        return commands.AutoShardedBot(command_prefix = '&', intents = discord.Intents.all(), **shard_options)
+
+    intents = discord.Intents.none()
+    intents.guilds = True  # 斜線指令, 頻道與身分組需要
+    return commands.AutoShardedBot(
+        command_prefix = '&',
+        intents = intents,
+        member_cache_flags = discord.MemberCacheFlags.none(),
+        max_messages = None,
+        chunk_guilds_at_startup = False,
+        **shard_options,
+    )
+
+
+class PollerBot(commands.Bot):
+    """
+    poller 模式不連線 Discord, 只載入輪詢的 cog
+    輪詢結果寫入 SQLite 的 outbox, 由 gateway 程序的 Delivery cog 傳送
+    """
+    def is_ready(self) -> bool:
+        return True
+
+    async def wait_until_ready(self):
+        return
+
+
+bot = PollerBot(command_prefix = '&', intents = discord.Intents.none()) if BOT_MODE == 'poller' else create_bot()
 
 
-def setting_log():
+def setting_log() -> QueueListener:
     # Clean up old log files
     log_folder_path = Path(__file__).parent / "log"
     for item in log_folder_path.iterdir():
@@ -26,20 +78,24 @@ def setting_log():
         encoding='utf-8'
     )
     handler.suffix = "%Y-%m-%d_%H-%M-%S.log"
-    handler.setFormatter(logging.Formatter('[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s', "%Y-%m-%d %H:%M:%S"))
 
-    logger = logging.getLogger('discord')
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(handler)
+    # 寫檔在背景執行緒進行, 不阻塞事件迴圈
+    return log.setup_queue_logging(handler)
 
 
 async def main():
-    setting_log()
-    async with bot:
-        await bot.load_extension(f"cogs.main")
-        await bot.load_extension(f"cogs.x")
-        await bot.load_extension(f"cogs.yt")
-        await bot.start(BOT_TOKEN)
+    listener = setting_log()
+    try:
+        async with bot:
+            await metrics.start_server()
+            profiling.LoopLagMonitor().start()
+            await asyncio.gather(*(bot.load_extension(f"cogs.{name}") for name in EXTENSIONS[BOT_MODE]))
+            if isinstance(bot, PollerBot):
+                await asyncio.Event().wait()  # 直到程序結束, 離開時 bot.close 會卸載 cog 並釋放租約
+            else:
+                await bot.start(BOT_TOKEN)
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
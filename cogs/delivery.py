@@ -0,0 +1,113 @@
+import logging
+
+import discord
+from discord.ext import commands, tasks
+
+from utils import (
+    DB, UserResolver,
+    OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT, OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX, OUTBOX_RETENTION_DAYS,
+    LATENCY_RETENTION_DAYS,
+    metrics, profiling,
+)
+
+logger = logging.getLogger('discord')
+
+
+class Delivery(commands.Cog):
+    """
+    從 outbox 取出待傳送的通知並私訊訂閱者或發送到廣播頻道
+    傳送失敗會以指數退避重試, 程式重啟後會從 outbox 中未完成的通知繼續傳送
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.db = DB().create_db()
+        self.resolver = UserResolver(bot, self.db)
+
+    async def cog_load(self):
+        self.deliver.start()
+        self.purge.start()
+
+    async def cog_unload(self):
+        self.deliver.cancel()
+        self.purge.cancel()
+
+    def __retry_delay(self, attempts: int) -> float:
+        return min(OUTBOX_RETRY_BASE * 2 ** attempts, OUTBOX_RETRY_MAX)
+
+    async def __send_channel(self, channel_id: int, role_id: str | None=None, **kwargs) -> bool | None:
+        """
+        只 mention 廣播身分組, 內容創作者的文字中的 @everyone 或 <@id> 不會通知
+        回傳值同 UserResolver.send
+        """
+        channel = self.bot.get_partial_messageable(channel_id)
+        allowed_mentions = discord.AllowedMentions(
+            everyone=False,
+            users=False,
+            roles=[discord.Object(int(role_id))] if role_id else False,
+        )
+        try:
+            await channel.send(allowed_mentions=allowed_mentions, **kwargs)
+            return True
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"無法發送到廣播頻道 {channel_id}: {e}")
+            return False
+        except discord.HTTPException as e:
+            logger.error(f"發送到廣播頻道 {channel_id} 失敗: {e}")
+            return None
+
+    def __create_embed(self, data: dict) -> discord.Embed:
+        """footer 在傳送時才加上, 輪詢的程序 (poller 模式) 沒有連線 Discord, 不知道 bot 的名稱與頭像"""
+        embed = discord.Embed.from_dict(data)
+        embed.set_footer(text=self.bot.user.name, icon_url=self.bot.user.avatar.url)
+        return embed
+
+    @tasks.loop(seconds=10)
+    @metrics.task_loop('delivery_deliver')
+    @profiling.profile_loop('delivery_deliver')
+    async def deliver(self):
+        # 一次取完所有到期的通知, 每批結束後立即記錄結果
+        while rows := self.db.claim_outbox(OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT):
+            self.resolver.prefetch([int(row['target_id']) for row in rows if row['target_type'] == 'dm'])
+            sent, retry, failed = [], {}, []
+
+            for row in rows:
+                payload = row['payload']
+                kwargs = {
+                    'content': payload.get('content'),
+                    'embeds': [self.__create_embed(embed) for embed in payload.get('embeds', [])],
+                }
+                if row['target_type'] == 'dm':
+                    result = await self.resolver.send(int(row['target_id']), **kwargs)
+                else:
+                    result = await self.__send_channel(int(row['target_id']), payload.get('role_id'), **kwargs)
+                if result:
+                    sent.append(row['id'])
+                    metrics.DELIVERIES.inc(target=row['target_type'], result='sent')
+                elif result is None and row['attempts'] + 1 < OUTBOX_MAX_ATTEMPTS:
+                    retry[row['id']] = self.__retry_delay(row['attempts'])
+                    metrics.DELIVERIES.inc(target=row['target_type'], result='retry')
+                else:
+                    failed.append(row['id'])
+                    metrics.DELIVERIES.inc(target=row['target_type'], result='failed')
+
+            self.db.finish_outbox(sent, retry, failed)
+            if failed:
+                logger.warning(f"放棄傳送 {len(failed)} 則通知")
+
+    @deliver.before_loop
+    async def before_deliver(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=24)
+    @metrics.task_loop('delivery_purge')
+    @profiling.profile_loop('delivery_purge')
+    async def purge(self):
+        cnt = self.db.purge_outbox(OUTBOX_RETENTION_DAYS)
+        logger.info(f'清除 {cnt} 則已完成的通知')
+        cnt = self.db.purge_item_latency(LATENCY_RETENTION_DAYS)
+        logger.info(f'清除 {cnt} 筆通知延遲紀錄')
+
+# Cog 載入 Bot 中
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Delivery(bot))
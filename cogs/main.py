@@ -1,12 +1,17 @@
+import asyncio
+from datetime import timedelta
 import logging
+import tempfile
+import time
 
 import discord
 from discord import app_commands
 from discord.ext import commands
+from discord.utils import utcnow
 
 from api.x_api import XAPI
 from api.yt_api import YoutubeAPI
-from utils import YT_COLOR, X_COLOR, SUB_EMBED_COLOR, MAX_EMBED_LIMIT, MAX_OPTION_LIMIT, DB
+from utils import YT_COLOR, X_COLOR, SUB_EMBED_COLOR, MAX_EMBED_LIMIT, MAX_OPTION_LIMIT, LATENCY_RETENTION_DAYS, BROADCAST_BACKFILL_BATCH, CACHE_SYNC_INTERVAL, DB, CreatorIndex, SubscriptionCache, latency, transfer
 
 logger = logging.getLogger('discord')
 
@@ -33,61 +38,128 @@ class XUserEmbed(discord.Embed):
         self.set_thumbnail(url=info['icon_url'])
 
 class SubView(discord.ui.View):
-    def __init__(self, dc_id: str, db: DB, timeout: int=180, placeholder: str="選擇要訂閱的內容創作者"):
+    """
+    以 select menu 選擇內容創作者, 超過 MAX_OPTION_LIMIT 個時分頁顯示
+    select 的選擇只代表目前這一頁的內容創作者
+    """
+    def __init__(self, index: CreatorIndex, subs: set[tuple[str, str]], timeout: int=180, placeholder: str="選擇要訂閱的內容創作者"):
+        """subs: 預設選擇的內容創作者 (platform, username)"""
         super().__init__(timeout=timeout)
-        self.dc_id = dc_id
-        self.db = db
+        self.placeholder = placeholder
         self.yt_value_prefix = "YT"
         self.x_value_prefix = "X"
+        
+        self.creators = index.all()
+        self.titles = {key: index.creators[key]['title'] for key in self.creators}
+        self.page = 0
+        self.page_count = max(1, -(-len(self.creators) // MAX_OPTION_LIMIT))
+        self.subs = set(subs)
 
         self.select = discord.ui.Select(
             placeholder=placeholder,
             min_values=0,
         )
         self.add_item(self.select)
-        self.initial_select()  # initial options for select menu by dc_id
+        if self.page_count > 1:
+            self.prev_button = discord.ui.Button(label="上一頁", style=discord.ButtonStyle.secondary)
+            self.next_button = discord.ui.Button(label="下一頁", style=discord.ButtonStyle.secondary)
+            self.prev_button.callback = lambda interaction: self.turn_page(interaction, -1)
+            self.next_button.callback = lambda interaction: self.turn_page(interaction, 1)
+            self.add_item(self.prev_button)
+            self.add_item(self.next_button)
+        self.initial_select()  # initial options for select menu by subs
         
-    def initial_select(self):
-        yt_sub, x_sub = self.db.get_dc_user_subs(self.dc_id)
+    def page_creators(self) -> list[tuple[str, str]]:
+        return self.creators[self.page * MAX_OPTION_LIMIT:(self.page + 1) * MAX_OPTION_LIMIT]
+    
+    def selected(self) -> set[tuple[str, str]]:
+        """目前這一頁被選擇的內容創作者 (platform, username)"""
+        keys = set()
+        for value in self.select.values:
+            if value.startswith(self.yt_value_prefix):
+                keys.add(('yt', value[len(self.yt_value_prefix):]))
+            elif value.startswith(self.x_value_prefix):
+                keys.add(('x', value[len(self.x_value_prefix):]))
+        return keys
         
-        for username, info in self.db.get_yt_users().items():
-            self.select.add_option(
-                label=f'{self.yt_value_prefix} - {info["title"]}',
-                value=self.yt_value_prefix + username,
-                default=username in yt_sub
-            )
-        for username, info in self.db.get_x_users().items():
+    def initial_select(self):
+        self.select.options = []
+        for platform, username in self.page_creators():
+            prefix = self.yt_value_prefix if platform == 'yt' else self.x_value_prefix
             self.select.add_option(
-                label=f'{self.x_value_prefix} - {info["title"]}',
-                value=self.x_value_prefix + username,
-                default=username in x_sub
+                label=f'{prefix} - {self.titles[(platform, username)]}'[:100],
+                value=prefix + username,
+                default=(platform, username) in self.subs
             )
         if len(self.select.options) == 0:
             self.select.placeholder = "目前沒有可訂閱的頻道"
             self.select.disabled = True
             self.select.add_option(label="無可用頻道", value="None")
             return
-        self.select.max_values = min(len(self.select.options), 25)
+        self.select.max_values = len(self.select.options)
+        if self.page_count > 1:
+            self.select.placeholder = f"{self.placeholder} ({self.page + 1}/{self.page_count})"
+            self.prev_button.disabled = self.page == 0
+            self.next_button.disabled = self.page == self.page_count - 1
+            
+    async def turn_page(self, interaction: discord.Interaction, delta: int):
+        self.page = min(max(self.page + delta, 0), self.page_count - 1)
+        self.initial_select()
+        await interaction.response.edit_message(view=self)
+
+
+class CreatorListView(discord.ui.View):
+    """分頁顯示所有內容創作者, 只在換頁時建立該頁的 embed"""
+    def __init__(self, index: CreatorIndex, timeout: int=180):
+        super().__init__(timeout=timeout)
+        self.index = index
+        self.creators = index.all()
+        self.page = 0
+        self.page_count = max(1, -(-len(self.creators) // MAX_EMBED_LIMIT))
+        
+        self.prev_button = discord.ui.Button(label="上一頁", style=discord.ButtonStyle.secondary)
+        self.next_button = discord.ui.Button(label="下一頁", style=discord.ButtonStyle.secondary)
+        self.prev_button.callback = lambda interaction: self.turn_page(interaction, -1)
+        self.next_button.callback = lambda interaction: self.turn_page(interaction, 1)
+        self.add_item(self.prev_button)
+        self.add_item(self.next_button)
+        self.update_buttons()
+        
+    def update_buttons(self):
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = self.page == self.page_count - 1
+        
+    def content(self) -> str:
+        return f"🟥: YT, ⬛: X ({self.page + 1}/{self.page_count})"
+        
+    def page_embeds(self) -> list[discord.Embed]:
+        embeds: list[discord.Embed] = []
+        for platform, username in self.creators[self.page * MAX_EMBED_LIMIT:(self.page + 1) * MAX_EMBED_LIMIT]:
+            info = self.index.creators[(platform, username)]
+            embeds.append(YTUserEmbed(username, info) if platform == 'yt' else XUserEmbed(username, info))
+        return embeds
+    
+    async def turn_page(self, interaction: discord.Interaction, delta: int):
+        self.page = min(max(self.page + delta, 0), self.page_count - 1)
+        self.update_buttons()
+        await interaction.response.edit_message(content=self.content(), embeds=self.page_embeds(), view=self)
 
 
 class SubEmbed(discord.Embed):
-    def __init__(self, dc_id: str, db: DB):
+    def __init__(self, subs: list[tuple[str, str, str]]):
+        """subs: [(platform, username, title)], 同 SubscriptionCache.get"""
         super().__init__(color=SUB_EMBED_COLOR)
         self.title = "訂閱中"
-        yt_sub_username, x_sub_username = db.get_dc_user_subs(dc_id)
-
-        yt_sub_title = [user['title'] for user in db.get_yt_users(yt_sub_username).values()]
-        x_sub_title = [user['title'] for user in db.get_x_users(x_sub_username).values()]
         
         yt_value = []
-        for title, username in zip(yt_sub_title, yt_sub_username):
-            yt_value.append(f'[{title}](https://www.youtube.com/@{username})')
+        x_value = []
+        for platform, username, title in subs:
+            if platform == 'yt':
+                yt_value.append(f'[{title}](https://www.youtube.com/@{username})')
+            else:
+                x_value.append(f'[{title}](https://x.com/{username})')
         if yt_value == []:
             yt_value = ["None"]
-            
-        x_value = []
-        for title, username in zip(x_sub_title, x_sub_username):
-            x_value.append(f'[{title}](https://x.com/{username})')
         if x_value == []:
             x_value = ["None"]
         
@@ -103,52 +175,200 @@ class Main(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = DB().create_db()
+        self.index = CreatorIndex.from_db(self.db)
+        self.sub_cache = SubscriptionCache(self.db)
+        DB.add_listener(self.index.on_db_change)
+        DB.add_listener(self.sub_cache.on_db_change)
+        self.background_tasks: set[asyncio.Task] = set()
+        self.cache_seq, _ = self.db.get_cache_changes()
+        self.cache_synced_at = time.monotonic()
+        
+    async def cog_unload(self):
+        for task in self.background_tasks:
+            task.cancel()
+        DB.remove_listener(self.index.on_db_change)
+        DB.remove_listener(self.sub_cache.on_db_change)
+    
+    def __sync_caches(self):
+        """
+        其他程序 (其他 shard 的 gateway 或 poller) 的變更不會通知本程序的 DB 監聽者
+        使用內容創作者目錄與訂閱快取前, 依 cache_versions 套用其他程序的變更
+        autocomplete 每次輸入都會呼叫, 最多每 CACHE_SYNC_INTERVAL 秒查詢一次資料庫
+        """
+        if time.monotonic() - self.cache_synced_at < CACHE_SYNC_INTERVAL:
+            return
+        self.cache_synced_at = time.monotonic()
+        self.cache_seq, changes = self.db.get_cache_changes(self.cache_seq)
+        creators: dict[str, list[str]] = {}
+        for event, key in changes:
+            if event == 'subs':
+                self.sub_cache.on_db_change('subs', dc_id=key)
+            else:
+                platform, _, username = key.partition(':')
+                creators.setdefault(platform, []).append(username)
+        for platform, usernames in creators.items():
+            self.index.on_db_change('creators', platform=platform, usernames=usernames)
+            self.sub_cache.on_db_change('creators', platform=platform, usernames=usernames)
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 每個斜線指令執行前同步快取
+        self.__sync_caches()
+        return True
+        
+    def __parse_creator(self, value: str) -> tuple[str, str] | None:
+        """將 autocomplete 的值 (platform:username) 轉回 (platform, username)"""
+        platform, _, username = value.partition(':')
+        if (platform, username) not in self.index.creators:
+            return None
+        return platform, username
+    
+    def __creator_choice(self, key: tuple[str, str]) -> app_commands.Choice[str]:
+        platform, username = key
+        name = f"{platform.upper()} - {self.index.creators[key]['title']} (@{username})"
+        return app_commands.Choice(name=name[:100], value=f"{platform}:{username}")
+
+    async def __sync_broadcast_roles(self, interaction: discord.Interaction, added: list[tuple[str, str]], removed: list[tuple[str, str]]):
+        """依照訂閱變更, 為使用者加上或移除此伺服器的廣播身分組"""
+        if interaction.guild is None or not isinstance(interaction.user, discord.Member):
+            return
+        broadcasts = self.db.get_guild_broadcasts(str(interaction.guild.id))
+        add_roles = [discord.Object(id=int(broadcasts[key]['role_id'])) for key in added if key in broadcasts]
+        remove_roles = [discord.Object(id=int(broadcasts[key]['role_id'])) for key in removed if key in broadcasts]
+        try:
+            if add_roles:
+                await interaction.user.add_roles(*add_roles, reason="訂閱內容創作者")
+                # 取得身分組的訂閱者改由頻道 mention 通知, 取消訂閱時由 trigger 移除紀錄
+                for platform, username in added:
+                    if (platform, username) in broadcasts:
+                        self.db.add_broadcast_members(platform, username, str(interaction.guild.id), [str(interaction.user.id)])
+            if remove_roles:
+                await interaction.user.remove_roles(*remove_roles, reason="取消訂閱內容創作者")
+        except discord.HTTPException as e:
+            logger.error(f"更新廣播身分組失敗: {e}")
+    
+    async def __backfill_broadcast_role(self, guild: discord.Guild, role: discord.Role, platform: str, username: str):
+        """
+        在背景為已訂閱的伺服器成員加上身分組, 不佔用指令的回應時間
+        不快取成員時改用 fetch_member 確認是否在伺服器中, REST 的速率限制由 discord.py 處理
+        """
+        members = []
+        for follower in self.db.get_followers(platform, username):
+            try:
+                member = guild.get_member(int(follower)) or await guild.fetch_member(int(follower))
+                await member.add_roles(role, reason="訂閱內容創作者")
+                members.append(follower)
+            except discord.NotFound:
+                continue
+            except discord.HTTPException as e:
+                logger.error(f"更新廣播身分組失敗: {e}")
+            if len(members) >= BROADCAST_BACKFILL_BATCH:
+                self.db.add_broadcast_members(platform, username, str(guild.id), members)
+                members = []
+        self.db.add_broadcast_members(platform, username, str(guild.id), members)
+        logger.info(f"廣播身分組 {role.id} 已完成加入既有訂閱者")
+            
+    async def __delete_broadcast_role(self, broadcast: dict[str, str]):
+        # 伺服器可能在其他程序的 shard 上, 不在快取中時改用 REST 取得
+        try:
+            guild = self.bot.get_guild(int(broadcast['guild_id'])) or await self.bot.fetch_guild(int(broadcast['guild_id']))
+        except discord.HTTPException as e:
+            logger.warning(f"無法取得伺服器 {broadcast['guild_id']}: {e}")
+            return
+        if (role := guild.get_role(int(broadcast['role_id']))) is None:
+            return
+        try:
+            await role.delete(reason="移除內容創作者廣播")
+        except discord.HTTPException as e:
+            logger.error(f"刪除廣播身分組失敗: {e}")
 
     @app_commands.command(name = "list_content_creator", description = "View content creator")
     async def list_content_creator(self, interaction: discord.Interaction):
-        embeds: list[discord.Embed] = []
-        
-        for username, info in self.db.get_yt_users().items():
-            embeds.append(YTUserEmbed(username, info))
-            
-        for username, info in self.db.get_x_users().items():
-            embeds.append(XUserEmbed(username, info))
-    
-        if len(embeds) == 0:
+        if len(self.index.creators) == 0:
             await interaction.response.send_message(content="目前沒有可訂閱的頻道", ephemeral=True)
+            return
+        
+        listview = CreatorListView(self.index, timeout=180)
+        if listview.page_count == 1:
+            await interaction.response.send_message(content=listview.content(), embeds=listview.page_embeds(), ephemeral=True)
         else:
-            msg = "🟥: YT, ⬛: X"
-            await interaction.response.send_message(content=msg, embeds=embeds[:MAX_EMBED_LIMIT], ephemeral=True)
-            for i in range(MAX_EMBED_LIMIT, len(embeds), MAX_EMBED_LIMIT):
-                await interaction.followup.send(embeds=embeds[i:i+MAX_EMBED_LIMIT], ephemeral=True)
+            await interaction.response.send_message(content=listview.content(), embeds=listview.page_embeds(), view=listview, ephemeral=True)
             
             
+    async def __update_subs(self, interaction: discord.Interaction, added: set[tuple[str, str]], removed: set[tuple[str, str]]):
+        dc_id = str(interaction.user.id)
+        self.db.add_dc_user_subs(dc_id, [u for p, u in added if p == 'yt'], [u for p, u in added if p == 'x'])
+        self.db.del_dc_user_subs(dc_id, [u for p, u in removed if p == 'yt'], [u for p, u in removed if p == 'x'])
+        await self.__sync_broadcast_roles(interaction, added=list(added), removed=list(removed))
+        
+        await interaction.response.send_message(
+            content="訂閱設定完成",
+            embed=SubEmbed(self.sub_cache.get(dc_id)),
+            ephemeral=True
+        )
+        
     @app_commands.command(name = "subscribe", description = "Sub content creator")
-    async def subscribe(self, interaction: discord.Interaction):
-        subview = SubView(str(interaction.user.id), self.db, timeout=180, placeholder="選擇要訂閱的內容創作者")
+    @app_commands.describe(creator = "輸入名稱搜尋內容創作者, 不填則列出全部")
+    async def subscribe(self, interaction: discord.Interaction, creator: str | None = None):
+        if creator is not None:
+            if (key := self.__parse_creator(creator)) is None:
+                await interaction.response.send_message(content="頻道不存在或輸入錯誤", ephemeral=True)
+                return
+            await self.__update_subs(interaction, added={key}, removed=set())
+            return
+        
+        # 沒有指定內容創作者時, 以分頁的 select menu 選擇
+        subs = self.sub_cache.get_keys(str(interaction.user.id))
+        subview = SubView(self.index, subs, timeout=180, placeholder="選擇要訂閱的內容創作者")
         
         async def select_callback(interaction: discord.Interaction):
-            dc_id = str(interaction.user.id)
-            old_yt_subs, old_x_subs = self.db.get_dc_user_subs(dc_id)
-            old_yt_subs, old_x_subs = set(old_yt_subs), set(old_x_subs)
-            new_yt_subs = set([v[len(subview.yt_value_prefix):] for v in subview.select.values if v.startswith(subview.yt_value_prefix)])
-            new_x_subs = set([v[len(subview.x_value_prefix):] for v in subview.select.values if v.startswith(subview.x_value_prefix)])
-            
-            self.db.add_dc_user_subs(dc_id, list(new_yt_subs - old_yt_subs), list(new_x_subs - old_x_subs))
-            self.db.del_dc_user_subs(dc_id, list(old_yt_subs - new_yt_subs), list(old_x_subs - new_x_subs))
-            
-            await interaction.response.send_message(
-                content="訂閱設定完成",
-                embed=SubEmbed(dc_id, self.db),
-                ephemeral=True
-            )
+            page = set(subview.page_creators())
+            old_subs = subview.subs & page
+            new_subs = subview.selected()
+            subview.subs = (subview.subs - page) | new_subs
+            await self.__update_subs(interaction, added=new_subs - old_subs, removed=old_subs - new_subs)
         subview.select.callback = select_callback
         await interaction.response.send_message(view=subview, ephemeral=True)
         
+    @subscribe.autocomplete('creator')
+    async def subscribe_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        self.__sync_caches()
+        return [self.__creator_choice(key) for key in self.index.search(current)]
+        
+        
+    @app_commands.command(name = "unsubscribe", description = "Unsub content creator")
+    @app_commands.describe(creator = "輸入名稱搜尋已訂閱的內容創作者")
+    async def unsubscribe(self, interaction: discord.Interaction, creator: str):
+        if (key := self.__parse_creator(creator)) is None:
+            await interaction.response.send_message(content="頻道不存在或輸入錯誤", ephemeral=True)
+            return
+        await self.__update_subs(interaction, added=set(), removed={key})
+        
+    @unsubscribe.autocomplete('creator')
+    async def unsubscribe_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        self.__sync_caches()
+        subs = self.sub_cache.get_keys(str(interaction.user.id))
+        return [self.__creator_choice(key) for key in self.index.search_in(subs, current)]
+        
         
     @app_commands.command(name = "list_subscribe", description = "List the Sub content creator")
     async def list_subscribe(self, interaction: discord.Interaction):
-        await interaction.response.send_message(embed=SubEmbed(str(interaction.user.id), self.db), ephemeral=True)
+        await interaction.response.send_message(embed=SubEmbed(self.sub_cache.get(str(interaction.user.id))), ephemeral=True)
+        
+        
+    @app_commands.command(name = "search", description = "Search content creator")
+    @app_commands.describe(query = "搜尋名稱或簡介")
+    async def search(self, interaction: discord.Interaction, query: str):
+        embeds: list[discord.Embed] = []
+        for key in self.db.search_creators(query, limit=MAX_EMBED_LIMIT):
+            if (info := self.index.creators.get(key)) is None:
+                continue
+            platform, username = key
+            embeds.append(YTUserEmbed(username, info) if platform == 'yt' else XUserEmbed(username, info))
+        
+        if len(embeds) == 0:
+            await interaction.response.send_message(content="找不到符合的內容創作者", ephemeral=True)
+        else:
+            await interaction.response.send_message(content="🟥: YT, ⬛: X", embeds=embeds, ephemeral=True)
         
         
     @app_commands.command(name='add_content_creator', description='Add content creator')
@@ -166,11 +386,6 @@ class Main(commands.Cog):
         """
         await interaction.response.defer(ephemeral=True)
         
-        total_user_cnt = len(self.db.get_yt_users()) + len(self.db.get_x_users())
-        if total_user_cnt >= MAX_OPTION_LIMIT:
-            await interaction.followup.send(content=f"支援的用戶總數已超出上限 ({MAX_OPTION_LIMIT}), 請刪除一些 X or YT 用戶", ephemeral=True)
-            return
-        
         if username.startswith('@'):
             username = username[1:]
             
@@ -200,14 +415,16 @@ class Main(commands.Cog):
     
     @app_commands.command(name='delete_content_creator', description='Delete content creator')
     async def delete_content_creator(self, interaction: discord.Interaction):
-        unsubview = SubView(str(interaction.user.id), self.db, timeout=180, placeholder="選擇要刪除的內容創作者")
-        for i in range(len(unsubview.select.options)):
-            unsubview.select.options[i].default = False
+        unsubview = SubView(self.index, set(), timeout=180, placeholder="選擇要刪除的內容創作者")
             
         async def select_callback(interaction: discord.Interaction):
-            yt_prefix, x_prefix = unsubview.yt_value_prefix, unsubview.x_value_prefix
-            yt_del = set([value[len(yt_prefix):] for value in unsubview.select.values if value.startswith(yt_prefix)])
-            x_del = set([value[len(x_prefix):] for value in unsubview.select.values if value.startswith(x_prefix)])
+            selected = unsubview.selected()
+            yt_del = set([username for platform, username in selected if platform == 'yt'])
+            x_del = set([username for platform, username in selected if platform == 'x'])
+            
+            # 刪除廣播身分組, 廣播設定會由 trigger 一併刪除
+            for broadcast in self.db.get_broadcasts('yt', list(yt_del)) + self.db.get_broadcasts('x', list(x_del)):
+                await self.__delete_broadcast_role(broadcast)
             
             # del dc user data
             self.db.del_yt_users(list(yt_del))
@@ -218,14 +435,192 @@ class Main(commands.Cog):
         await interaction.response.send_message(view=unsubview, ephemeral=True)
 
 
+    @app_commands.command(name='bind_broadcast', description='Post new content of a creator to a channel with role mention')
+    @app_commands.describe(platform = "平台 (YT or X)", username = "User name", channel = "發送通知的頻道")
+    @app_commands.choices(
+        platform = [
+            app_commands.Choice(name = "YT", value = "YT"),
+            app_commands.Choice(name = "X", value = "X"),
+        ]
+    )
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    async def bind_broadcast(self, interaction: discord.Interaction, platform: str, username: str, channel: discord.TextChannel):
+        """
+        綁定後此內容創作者的新內容只會發送到頻道並 mention 訂閱身分組, 不再私訊訂閱者
+        在此伺服器使用 /subscribe 訂閱時會自動加上身分組
+        """
+        await interaction.response.defer(ephemeral=True)
+        
+        if username.startswith('@'):
+            username = username[1:]
+        platform = platform.lower()
+        users = self.db.get_yt_users([username]) if platform == 'yt' else self.db.get_x_users([username])
+        if username not in users:
+            await interaction.followup.send(content="頻道不存在, 請先使用 /add_content_creator 新增", ephemeral=True)
+            return
+        
+        guild_id = str(interaction.guild.id)
+        if broadcast := self.db.get_guild_broadcasts(guild_id).get((platform, username)):
+            role_id = broadcast['role_id']
+        else:
+            try:
+                role = await interaction.guild.create_role(name=f"{users[username]['title']} 通知", mentionable=True, reason="內容創作者廣播")
+            except discord.HTTPException as e:
+                logger.error(f"建立廣播身分組失敗: {e}")
+                await interaction.followup.send(content="無法建立身分組, 請確認機器人權限", ephemeral=True)
+                return
+            role_id = str(role.id)
+        
+        self.db.set_broadcast(platform, username, guild_id, str(channel.id), role_id)
+        if broadcast is None:
+            # 已訂閱的伺服器成員在背景加上身分組, 完成前仍以私訊通知
+            task = asyncio.create_task(self.__backfill_broadcast_role(interaction.guild, role, platform, username))
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+        await interaction.followup.send(content=f"已綁定 {channel.mention}, 身分組 <@&{role_id}>", ephemeral=True)
+        
+        
+    @app_commands.command(name='unbind_broadcast', description='Stop posting a creator to a channel')
+    @app_commands.describe(platform = "平台 (YT or X)", username = "User name")
+    @app_commands.choices(
+        platform = [
+            app_commands.Choice(name = "YT", value = "YT"),
+            app_commands.Choice(name = "X", value = "X"),
+        ]
+    )
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    async def unbind_broadcast(self, interaction: discord.Interaction, platform: str, username: str):
+        await interaction.response.defer(ephemeral=True)
+        
+        if username.startswith('@'):
+            username = username[1:]
+        platform = platform.lower()
+        broadcast = self.db.get_guild_broadcasts(str(interaction.guild.id)).get((platform, username))
+        if broadcast is None:
+            await interaction.followup.send(content="此頻道沒有綁定廣播", ephemeral=True)
+            return
+        
+        await self.__delete_broadcast_role(broadcast)
+        self.db.del_broadcast(platform, username, broadcast['guild_id'])
+        await interaction.followup.send(content="已解除綁定", ephemeral=True)
+        
+        
+    @app_commands.command(name='latency_report', description='Notification latency report')
+    @app_commands.describe(days = "統計最近幾天的內容", platform = "平台 (YT or X), 不填則為全部")
+    @app_commands.choices(
+        platform = [
+            app_commands.Choice(name = "YT", value = "YT"),
+            app_commands.Choice(name = "X", value = "X"),
+        ]
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def latency_report(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, LATENCY_RETENTION_DAYS]=7, platform: str | None=None):
+        """各平台與最慢的內容創作者的 p50 / p95 / p99 偵測延遲與送達延遲"""
+        since = (utcnow() - timedelta(days=days)).isoformat()
+        rows = self.db.get_item_latencies(since, platform.lower() if platform else None)
+        if not rows:
+            await interaction.response.send_message(content=f"最近 {days} 天沒有通知紀錄", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            color=SUB_EMBED_COLOR,
+            title=f"通知延遲 (最近 {days} 天)",
+            description="p50 / p95 / p99\n偵測: 發布到輪詢發現, 送達: 發布到最後一則通知送達",
+        )
+        for name, stats in sorted(latency.summarize(rows, lambda row: row['platform']).items(), reverse=True):
+            embed.add_field(
+                name=f"{name.upper()} ({stats['count']} 則)",
+                value=f"偵測: {latency.format_percentiles(stats['detect'])}\n送達: {latency.format_percentiles(stats['deliver'])}",
+                inline=False,
+            )
+        
+        # 依送達 p95 列出最慢的內容創作者
+        creators = latency.summarize(rows, lambda row: (row['platform'], row['username']))
+        slowest = sorted(creators.items(), key=lambda item: (item[1]['deliver'] or item[1]['detect'] or (0, 0))[1], reverse=True)
+        for (creator_platform, username), stats in slowest[:MAX_EMBED_LIMIT]:
+            title = self.index.creators.get((creator_platform, username), {}).get('title') or username
+            embed.add_field(
+                name=f"{creator_platform.upper()} {title} ({stats['count']} 則)",
+                value=f"偵測: {latency.format_percentiles(stats['detect'])}\n送達: {latency.format_percentiles(stats['deliver'])}",
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+    @app_commands.command(name='import_data', description='Import content creators and subscriptions from a JSON / CSV file')
+    @app_commands.describe(file = "JSON 陣列, JSON Lines 或 CSV 檔, 格式同 /export_data")
+    @app_commands.default_permissions(administrator=True)
+    async def import_data(self, interaction: discord.Interaction, file: discord.Attachment):
+        """批次匯入內容創作者, 訂閱與廣播設定, 已存在的內容創作者不會重新查詢"""
+        await interaction.response.defer(ephemeral=True)
+        
+        data = transfer.parse(await file.read(), file.filename)
+        if not data.creators:
+            await interaction.followup.send(content="檔案中沒有可匯入的資料\n" + '\n'.join(data.errors[:10]), ephemeral=True)
+            return
+        
+        result, missing = await transfer.import_data(self.db, data, YoutubeAPI(), XAPI(), skip=set(self.index.creators))
+        if result is None:
+            await interaction.followup.send(content="匯入失敗, 資料庫未變更", ephemeral=True)
+            return
+        
+        lines = [
+            f"新增 YT 頻道 {result['yt']} 個, X 使用者 {result['x']} 個",
+            f"新增訂閱 {result['subs']} 筆, 廣播 {result['broadcasts']} 筆",
+        ]
+        if missing:
+            lines.append(f"找不到 {len(missing)} 個內容創作者: " + ', '.join(f"{platform.upper()} @{username}" for platform, username in missing))
+        lines.extend(data.errors)
+        content = '\n'.join(lines)
+        if len(content) > 2000:
+            content = content[:1997] + '...'
+        await interaction.followup.send(content=content, ephemeral=True)
+    
+    @app_commands.command(name='export_data', description='Export all content creators and subscriptions')
+    @app_commands.choices(
+        format = [
+            app_commands.Choice(name = "JSON Lines", value = "jsonl"),
+            app_commands.Choice(name = "CSV", value = "csv"),
+        ]
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def export_data(self, interaction: discord.Interaction, format: str='jsonl'):
+        """逐筆寫入暫存檔後上傳, 超過上傳上限時請改用 python -m utils.transfer export"""
+        await interaction.response.defer(ephemeral=True)
+        
+        with tempfile.TemporaryFile() as fp:
+            count = await asyncio.to_thread(transfer.write_export, self.db, fp, format)
+            size = fp.tell()
+            limit = interaction.guild.filesize_limit if interaction.guild else 10 * 1024 * 1024
+            if size > limit:
+                await interaction.followup.send(content=f"匯出檔案過大 ({size / 1024 / 1024:.1f} MB), 請在主機上執行 python -m utils.transfer export", ephemeral=True)
+                return
+            fp.seek(0)
+            await interaction.followup.send(
+                content=f"已匯出 {count} 筆",
+                file=discord.File(fp, filename=f"export.{format}"),
+                ephemeral=True,
+            )
+
+
     # 當機器人完成啟動時
     @commands.Cog.listener()
     async def on_ready(self):
-        slash = await self.bot.tree.sync()
-        logger.info(f'{self.bot.user} 已登入, 載入 {len(slash)} 個斜線指令')
+        # 斜線指令是全域的, 多個程序分擔 shard 時只由負責 shard 0 的程序同步
+        if (shard_ids := getattr(self.bot, 'shard_ids', None)) is None or 0 in shard_ids:
+            slash = await self.bot.tree.sync()
+            logger.info(f'{self.bot.user} 已登入, 載入 {len(slash)} 個斜線指令')
+        else:
+            logger.info(f'{self.bot.user} 已登入')
         game = discord.Game('YT & X')
         await self.bot.change_presence(status=discord.Status.online, activity=game)
 
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id: int):
+        logger.info(f'shard {shard_id} / {self.bot.shard_count} 已連線')
+
 # Cog 載入 Bot 中
 async def setup(bot: commands.Bot):
     await bot.add_cog(Main(bot))
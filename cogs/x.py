@@ -1,10 +1,11 @@
 from collections import deque
 import logging
+import time
 
 from discord.ext import commands, tasks
 
 from api.x_api import XAPI
-from utils import DB
+from utils import SCHEDULE_CHECKPOINT_INTERVAL, DB, LeaseManager, metrics, profiling
 
 
 logger = logging.getLogger('discord')
@@ -15,46 +16,86 @@ class X(commands.Cog):
         self.x_api = XAPI()
         self.user_q = deque()
         self.db = DB().create_db()
+        self.lease = LeaseManager(self.db)
+        # 每位使用者上次輪詢的時間, 佇列依此排序, 重啟後從上次的進度繼續
+        self.last_polled: dict[str, float] = self.db.get_poll_state('x', 'queue')
+        self.unsaved: dict[str, float] = {}
         
     # 當機器人完成啟動時
     async def cog_load(self):
-        await self.x_api.initialize()
         self.update_new_tweets.start()
+        self.save_schedule.start()
         
     async def cog_unload(self):
         self.update_new_tweets.cancel()
+        self.save_schedule.cancel()
+        self.__save_schedule()
+        self.lease.release('x')
+    
+    def __save_schedule(self):
+        # 只寫入自己輪詢過的使用者, 不覆蓋其他 worker 的進度
+        if self.db.save_poll_state('x', 'queue', self.unsaved):
+            self.unsaved = {}
 
     # 因為 api 有使用限制, 所以設定固定時間檢查一位 x's user 的新 tweet
     @tasks.loop(minutes=2)
+    @metrics.task_loop('x_update_new_tweets')
+    @profiling.profile_loop('x_update_new_tweets')
     async def update_new_tweets(self):
         """
         找出在queue中且有人訂閱的名子然後使用x api, 只後私訊所有訂閱者,
         """
         logger.info('start update new tweets')
         
+        # 登入失敗時只記錄錯誤, 下一次輪詢再重試, 不讓例外中止 task loop
+        try:
+            await self.x_api.initialize()
+        except Exception as e:
+            logger.error(f"X 登入失敗, 下次輪詢時重試: {e}")
+            return
+        
         data = self.db.get_x_users()
+        # 只輪詢取得租約的使用者, 其他使用者由別的 worker 負責
+        owned = set(self.lease.acquire('x', list(data.keys())))
         if len(self.user_q) == 0:
-            self.user_q = deque(data.keys())
+            # 最久沒有輪詢的在前, 輪詢到一半被中斷的使用者沒有更新時間, 會排在最前面
+            self.user_q = deque(sorted(
+                (username for username in data.keys() if username in owned),
+                key=lambda username: self.last_polled.get(username, 0.0),
+            ))
             
-        # avoid username in queue but not in database
-        while self.user_q and self.user_q[0] not in data:
+        # avoid username in queue but not in database or owned by other worker
+        while self.user_q and self.user_q[0] not in owned:
             self.user_q.popleft()
         if len(self.user_q) == 0:
             return
             
         username = self.user_q.popleft()
-        new_tweet_urls, author_info, last_updated = await self.x_api.get_new_tweets(username, data[username]['last_updated'])
+        new_tweet_urls, author_info, last_updated, published = await self.x_api.get_new_tweets(username, data[username]['last_updated'])
+        notifications = [(username, url.rsplit('/', 1)[-1], {'content': url}) for url in new_tweet_urls]
+        published_at = {url.rsplit('/', 1)[-1]: created_on for url, created_on in zip(new_tweet_urls, published)}
         if new_tweet_urls:
-            for follower in self.db.get_followers('x', username):
-                user = self.bot.get_user(int(follower))
-                if user is not None:
-                    await user.send(content='\n'.join(new_tweet_urls))
             data[username]['title'] = author_info['title']
             data[username]['icon_url'] = author_info['icon_url']
             data[username]['description'] = author_info['description']
         data[username]['last_updated'] = last_updated
-        self.db.update_x_users({username: data[username]})
-    
+        # 新推文通知與 last_updated 一起寫入, 由 Delivery cog 負責私訊
+        self.db.enqueue_notifications('x', {username: data[username]}, notifications, published_at=published_at)
+        self.last_polled[username] = self.unsaved[username] = time.time()
+
+    @tasks.loop(seconds=SCHEDULE_CHECKPOINT_INTERVAL)
+    async def save_schedule(self):
+        self.__save_schedule()
+
+    @update_new_tweets.before_loop
+    async def before_update_new_tweets(self):
+        # gateway 連線後才在背景登入 X, 登入不會延遲 bot 上線
+        await self.bot.wait_until_ready()
+        try:
+            await self.x_api.initialize()
+        except Exception as e:
+            logger.error(f"X 登入失敗, 之後輪詢時會重試: {e}")
+
 # Cog 載入 Bot 中
 async def setup(bot: commands.Bot):
     await bot.add_cog(X(bot))
\ No newline at end of file
@@ -1,5 +1,7 @@
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 import logging
+import os
 import re
 
 import discord
@@ -7,7 +9,19 @@ from discord.utils import utcnow
 from discord.ext import commands, tasks
 
 from api.yt_api import YoutubeAPI
-from utils import YT_COLOR, MAX_EMBED_LIMIT, DB
+from utils import YT_COLOR, SCHEDULE_CHECKPOINT_INTERVAL, DB, LeaseManager, PollScheduler, metrics, profiling
+
+YT_POLL_CONCURRENCY = int(os.getenv("YT_POLL_CONCURRENCY", "8"))  # 同時輪詢的頻道數量
+YT_POLL_PERIOD = float(os.getenv("YT_POLL_PERIOD", "300"))  # 每個頻道檢查新影片的週期 (秒)
+YT_REFRESH_PERIOD = float(os.getenv("YT_REFRESH_PERIOD", str(24 * 60 * 60)))  # 每個頻道更新頻道資訊的週期 (秒)
+YT_POLL_JITTER = float(os.getenv("YT_POLL_JITTER", "0"))  # 到期後額外的隨機延遲上限 (秒)
+YT_POLL_TICK = 15  # 檢查是否有頻道到期的間隔 (秒)
+YT_LIVE_CHECK_INTERVAL = float(os.getenv("YT_LIVE_CHECK_INTERVAL", "60"))  # 接近預定時間的直播檢查是否開始的間隔 (秒)
+YT_LIVE_END_INTERVAL = float(os.getenv("YT_LIVE_END_INTERVAL", "300"))  # 直播中檢查是否結束的間隔 (秒)
+YT_LIVE_LEAD = timedelta(minutes=2)  # 預定時間前多久開始密集檢查
+YT_LIVE_MAX_WAIT = timedelta(hours=1)  # 預定時間還很久時也至少這麼久檢查一次, 避免錯過提前的直播
+YT_LIVE_STALE = timedelta(days=1)  # 超過預定時間這麼久仍未開始的直播不再追蹤
+YT_LIVE_TICK = 30  # 檢查是否有直播到期的間隔 (秒)
 
 logger = logging.getLogger('discord')
 
@@ -17,12 +31,30 @@ class Youtube(commands.Cog):
         self.bot = bot
         self.yt_api = YoutubeAPI()
         self.db = DB().create_db()
+        self.lease = LeaseManager(self.db)
+        self.poll_semaphore = asyncio.Semaphore(YT_POLL_CONCURRENCY)
+        # 每個頻道在週期內有固定的時間點, 輪詢與更新頻道資訊平均分散在整個週期
+        self.poll_schedule = PollScheduler(YT_POLL_PERIOD, YT_POLL_JITTER, salt='yt')
+        self.refresh_schedule = PollScheduler(YT_REFRESH_PERIOD, YT_POLL_JITTER, salt='yt-refresh')
+        # 從上次關閉前的排程繼續, 重啟期間錯過的頻道會補上
+        self.poll_schedule.restore(self.db.get_poll_state('yt', 'poll'))
+        self.refresh_schedule.restore(self.db.get_poll_state('yt', 'refresh'))
         self.update_new_video.start()
         self.update_channel_info.start()
+        self.track_live.start()
+        self.save_schedule.start()
         
     async def cog_unload(self):
         self.update_new_video.cancel()
         self.update_channel_info.cancel()
+        self.track_live.cancel()
+        self.save_schedule.cancel()
+        self.__save_schedule()
+        self.lease.release('yt')
+    
+    def __save_schedule(self):
+        self.db.save_poll_state('yt', 'poll', self.poll_schedule.checkpoint())
+        self.db.save_poll_state('yt', 'refresh', self.refresh_schedule.checkpoint())
     
     def __duration_transfer(self, duration: str) -> str:
         """
@@ -72,7 +104,6 @@ class Youtube(commands.Cog):
         embed.set_author(name=channel_title, url=channel_url, icon_url=channel_icon_url)
         embed.set_thumbnail(url=channel_icon_url)
         embed.set_image(url=video_thumbnail_url)
-        embed.set_footer(text=self.bot.user.name, icon_url=self.bot.user.avatar.url)
         
         video_duration_dict = self.yt_api.analyze_data(video_info, ['contentDetails', 'duration'])
         video_duration = self.__duration_transfer(video_duration_dict)
@@ -107,32 +138,180 @@ class Youtube(commands.Cog):
         return embed
     
     
-    @tasks.loop(minutes=5)
-    async def update_new_video(self):
+    def __live_video(self, username: str, video_info: dict, now: datetime) -> dict[str, str] | None:
+        """
+        upcoming / live 的影片回傳 live_tracker 的資料與下一次檢查時間, 其他回傳 None (不追蹤)
+        upcoming 在預定時間前 YT_LIVE_LEAD 才開始每 YT_LIVE_CHECK_INTERVAL 檢查, live 每 YT_LIVE_END_INTERVAL 檢查
+        """
+        status = self.yt_api.analyze_data(video_info, ['snippet', 'liveBroadcastContent'])
+        scheduled_start = self.yt_api.analyze_data(video_info, ['liveStreamingDetails', 'scheduledStartTime'])
+        if status == 'upcoming':
+            next_check = now + timedelta(seconds=YT_LIVE_CHECK_INTERVAL)
+            if scheduled_start:
+                start = datetime.fromisoformat(scheduled_start)
+                if now - start > YT_LIVE_STALE:
+                    return None
+                if start - now > YT_LIVE_LEAD:
+                    next_check = min(start - YT_LIVE_LEAD, now + YT_LIVE_MAX_WAIT)
+        elif status == 'live':
+            next_check = now + timedelta(seconds=YT_LIVE_END_INTERVAL)
+        else:
+            return None
+        return {
+            'username': username,
+            'status': status,
+            'scheduled_start_at': scheduled_start,
+            'next_check_at': next_check.isoformat(),
+        }
+    
+    def __get_owned_yt_users(self) -> dict[str, dict]:
+        """只回傳取得租約的頻道, 其他頻道由別的 worker 負責"""
         data = self.db.get_yt_users()
+        owned = self.lease.acquire('yt', list(data.keys()))
+        return {username: data[username] for username in owned}
+    
+    async def __poll_channel(self, username: str, info: dict):
+        """
+        輪詢單一頻道的新影片, 錯誤或逾時只會影響這個頻道, last_updated 不變所以下次會重新檢查
+        googleapiclient 是同步 api, 在 thread 中執行避免卡住 event loop
+        逾時由 HTTP 連線處理, thread 結束後才釋放 semaphore, 同時執行的請求不會超過 YT_POLL_CONCURRENCY
+        """
+        async with self.poll_semaphore:
+            try:
+                new_video_infos, last_updated = await asyncio.to_thread(
+                    self.yt_api.get_new_videos, info['uploads_id'], datetime.fromisoformat(info['last_updated'])
+                )
+            except TimeoutError:
+                logger.warning(f"輪詢 YT 頻道逾時: {username}")
+                return
+            except Exception as e:
+                logger.error(f"輪詢 YT 頻道失敗: {username}: {e}")
+                return
+        
+        try:
+            notifications = [
+                (username, video_info['id'], {'embeds': [self.__create_embed(video_info, info['icon_url']).to_dict()]})
+                for video_info in new_video_infos
+            ]
+            now = utcnow()
+            live_videos = {
+                video_info['id']: live
+                for video_info in new_video_infos
+                if (live := self.__live_video(username, video_info, now)) is not None
+            }
+            published_at = {video_info['id']: self.yt_api.analyze_data(video_info, ['snippet', 'publishedAt']) for video_info in new_video_infos}
+        except Exception as e:
+            logger.error(f"建立 YT 通知失敗: {username}: {e}")
+            return
+        # 新影片通知與 last_updated 一起寫入, 由 Delivery cog 負責私訊, 直播另外加入 live_tracker 追蹤
+        self.db.enqueue_notifications('yt', {username: {'last_updated': last_updated.isoformat()}}, notifications, live_videos, published_at)
+    
+    @tasks.loop(seconds=YT_POLL_TICK)
+    @metrics.task_loop('yt_update_new_video')
+    @profiling.profile_loop('yt_update_new_video')
+    async def update_new_video(self):
+        data = self.__get_owned_yt_users()
+        idle_data = {}
+        polls = []
         
-        for useranme, info in data.items():
+        due = self.poll_schedule.due(list(data.keys()))
+        for useranme in due:
+            info = data[useranme]
             if info['follower_cnt'] == 0:
-                data[useranme]['last_updated'] = utcnow().isoformat()
+                idle_data[useranme] = {'last_updated': utcnow().isoformat()}
                 continue
-            new_video_infos, last_updated = self.yt_api.get_new_videos(info['uploads_id'], datetime.fromisoformat(info['last_updated']))
-            new_video_embeds = [self.__create_embed(video_info, info['icon_url']) for video_info in new_video_infos]
-            for follower in self.db.get_followers('yt', useranme):
-                if user := self.bot.get_user(int(follower)):
-                    for i in range(0, len(new_video_embeds), MAX_EMBED_LIMIT):
-                        await user.send(embeds=new_video_embeds[i:i+MAX_EMBED_LIMIT])
-            data[useranme]['last_updated'] = last_updated.isoformat()
-        self.db.update_yt_users(data)
+            polls.append(self.__poll_channel(useranme, info))
+        await asyncio.gather(*polls)
+        self.db.update_yt_users(idle_data)
+        # 中途被取消 (關閉) 時不會執行到這裡, 這些頻道在 checkpoint 中保留原本的到期時間
+        for username in due:
+            self.poll_schedule.finish(username)
         
-    @tasks.loop(hours=24)
+    @tasks.loop(minutes=1)
+    @metrics.task_loop('yt_update_channel_info')
+    @profiling.profile_loop('yt_update_channel_info')
     async def update_channel_info(self):
-        data = self.db.get_yt_users()
-        for username in data.keys():
-            info = self.yt_api.get_channel_info(user_id=data[username]['id'])
-            data[username]['title'] = info['title']
-            data[username]['icon_url'] = info['icon_url']
-            data[username]['description'] = info['description']
-        self.db.update_yt_users(data)
+        data = self.__get_owned_yt_users()
+        updated = {}
+        due = self.refresh_schedule.due(list(data.keys()))
+        for username in due:
+            try:
+                info = await asyncio.to_thread(self.yt_api.get_channel_info, user_id=data[username]['id'])
+            except Exception as e:
+                logger.error(f"更新 YT 頻道資訊失敗: {username}: {e}")
+                continue
+            if not info:
+                continue
+            updated[username] = {
+                'title': info['title'],
+                'icon_url': info['icon_url'],
+                'description': info['description'],
+            }
+        self.db.update_yt_users(updated)
+        for username in due:
+            self.refresh_schedule.finish(username)
+
+    @tasks.loop(seconds=YT_LIVE_TICK)
+    @metrics.task_loop('yt_track_live')
+    @profiling.profile_loop('yt_track_live')
+    async def track_live(self):
+        """
+        只重新查詢 live_tracker 中到期的影片, 以一次 videos.list 批次取得狀態
+        upcoming -> live 時通知開始直播, 直播結束時通知已結束並停止追蹤
+        """
+        now = utcnow()
+        due = self.db.get_due_live_videos(now.isoformat(), self.lease.worker_id)
+        if not due:
+            return
+        # 續約並排除剛失去租約的頻道
+        users = self.__get_owned_yt_users()
+        due = [row for row in due if row['username'] in users]
+        if not due:
+            return
+        
+        try:
+            video_infos = await asyncio.to_thread(self.yt_api.get_videos_info, [row['video_id'] for row in due])
+        except Exception as e:
+            logger.error(f"查詢直播狀態失敗: {e!r}")
+            return
+        
+        notifications = []
+        live_videos = {}
+        published_at = {}
+        for row in due:
+            video_id, username = row['video_id'], row['username']
+            # 查不到代表影片已刪除或設為私人
+            if (video_info := video_infos.get(video_id)) is None:
+                live_videos[video_id] = None
+                continue
+            try:
+                live_videos[video_id] = live = self.__live_video(username, video_info, now)
+                if live is not None and live['status'] == 'live' and row['status'] == 'upcoming':
+                    item_id = f"{video_id}:live"
+                    published_at[item_id] = self.yt_api.analyze_data(video_info, ['liveStreamingDetails', 'actualStartTime'])
+                elif live is None and (end_time := self.yt_api.analyze_data(video_info, ['liveStreamingDetails', 'actualEndTime'])):
+                    item_id = f"{video_id}:ended"
+                    published_at[item_id] = end_time
+                else:
+                    continue
+                embed = self.__create_embed(video_info, users[username]['icon_url'])
+                notifications.append((username, item_id, {'embeds': [embed.to_dict()]}))
+            except Exception as e:
+                # 不更新追蹤狀態, 下次重試
+                live_videos.pop(video_id, None)
+                logger.error(f"建立直播通知失敗: {video_id}: {e}")
+        self.db.enqueue_notifications('yt', {}, notifications, live_videos, published_at)
+        
+    @tasks.loop(seconds=SCHEDULE_CHECKPOINT_INTERVAL)
+    async def save_schedule(self):
+        self.__save_schedule()
+        
+    @update_new_video.before_loop
+    @update_channel_info.before_loop
+    @track_live.before_loop
+    async def before_poll(self):
+        # gateway 連線後才開始輪詢, 不和 bot 啟動搶資源
+        await self.bot.wait_until_ready()
 
 # Cog 載入 Bot 中
 async def setup(bot: commands.Bot):
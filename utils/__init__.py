@@ -1,16 +1,58 @@
 from .db import DB
+from .resolver import UserResolver
+from .lease import LeaseManager
+from .scheduler import PollScheduler
+from .creator_index import CreatorIndex
+from .subscription_cache import SubscriptionCache
 from .constants import (
     YT_COLOR, X_COLOR, SUB_EMBED_COLOR, 
     MAX_EMBED_LIMIT, MAX_OPTION_LIMIT,
+    OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_TIMEOUT, OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX, OUTBOX_RETENTION_DAYS,
+    CACHE_SYNC_INTERVAL,
+    BROADCAST_BACKFILL_BATCH,
+    LATENCY_RETENTION_DAYS,
+    SCHEDULE_CHECKPOINT_INTERVAL,
 )
 
 __all__ = [
     # 資料庫
     'DB',
     
+    # Discord 使用者解析
+    'UserResolver',
+    
+    # 多程序輪詢分配
+    'LeaseManager',
+    
+    # 輪詢排程
+    'PollScheduler',
+    
+    # 內容創作者目錄
+    'CreatorIndex',
+    
+    # 訂閱列表快取
+    'SubscriptionCache',
+    
     # 顏色常數
     'YT_COLOR', 'X_COLOR', 'SUB_EMBED_COLOR',
     
     # Discord 限制
     'MAX_EMBED_LIMIT', 'MAX_OPTION_LIMIT',
+    
+    # 通知 outbox 設定
+    'OUTBOX_BATCH_SIZE', 'OUTBOX_CLAIM_TIMEOUT', 'OUTBOX_MAX_ATTEMPTS',
+    'OUTBOX_RETRY_BASE', 'OUTBOX_RETRY_MAX', 'OUTBOX_RETENTION_DAYS',
+    
+    # 快取同步設定
+    'CACHE_SYNC_INTERVAL',
+    
+    # 伺服器廣播設定
+    'BROADCAST_BACKFILL_BATCH',
+    
+    # 通知延遲統計設定
+    'LATENCY_RETENTION_DAYS',
+    
+    # 輪詢排程設定
+    'SCHEDULE_CHECKPOINT_INTERVAL',
 ]
\ No newline at end of file
@@ -8,3 +8,29 @@ SUB_EMBED_COLOR = 0x6B8CAE
 # Discord 限制
 MAX_EMBED_LIMIT = 10  # Discord 每次最多傳 10 個 embed
 MAX_OPTION_LIMIT = 25  # Discord select menu 每次最多傳 25 個選項
+
+# 使用者快取設定
+USER_CACHE_SIZE = 1024  # fetch_user 結果的 LRU 快取大小
+NEGATIVE_CACHE_TTL = 60 * 60  # 找不到的使用者多久內不再查詢 (秒)
+
+# 通知 outbox 設定
+OUTBOX_BATCH_SIZE = 50  # 每次最多取出幾筆通知
+OUTBOX_CLAIM_TIMEOUT = 5 * 60  # 取出後多久沒完成就重新傳送 (秒)
+OUTBOX_MAX_ATTEMPTS = 5  # 超過重試次數就放棄
+OUTBOX_RETRY_BASE = 30  # 第一次重試的等待時間, 之後每次加倍 (秒)
+OUTBOX_RETRY_MAX = 60 * 60  # 重試等待時間上限 (秒)
+OUTBOX_RETENTION_DAYS = 7  # 已完成的通知保留天數, 期間內同一則通知不會重複傳送
+
+# 訂閱列表快取設定
+SUB_CACHE_SIZE = 1024  # 最多快取幾位 dc user 的訂閱列表
+SUB_CACHE_TTL = 10 * 60  # 快取有效時間 (秒), 其他程序的變更另外依 cache_versions 清除
+CACHE_SYNC_INTERVAL = 5  # 最多每隔幾秒查詢一次 cache_versions, 其他程序的變更最多延遲這麼久
+
+# 伺服器廣播設定
+BROADCAST_BACKFILL_BATCH = 50  # 綁定廣播時, 每加上幾位訂閱者的身分組就寫入一次資料庫
+
+# 通知延遲統計設定
+LATENCY_RETENTION_DAYS = 30  # 每則內容的延遲紀錄保留天數
+
+# 輪詢排程設定
+SCHEDULE_CHECKPOINT_INTERVAL = 60  # 輪詢排程寫入資料庫的間隔 (秒), 關閉時也會寫入
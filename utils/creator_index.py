@@ -0,0 +1,114 @@
+import heapq
+import re
+from typing import Literal
+
+from .db import DB
+
+CreatorKey = tuple[str, str]  # (platform, username), platform 為 yt or x
+
+
+class _TrieNode:
+    __slots__ = ('children', 'keys')
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.keys: set[CreatorKey] = set()  # 所有經過此節點的內容創作者
+
+
+class CreatorIndex:
+    """
+    記憶體中的內容創作者目錄, 提供 autocomplete 使用的前綴查詢
+
+    - username, title 以及 title 中的每個單字都會加入 trie, 不分大小寫
+    - 每個 trie 節點記錄經過它的內容創作者, 查詢只需要走過前綴長度的節點
+    - 以 DB.add_listener(index.on_db_change) 註冊後, 內容創作者新增, 刪除或資料變更時自動同步
+    """
+    def __init__(self, db: DB):
+        self.db = db
+        self.creators: dict[CreatorKey, dict[str, str | int]] = {}
+        self.sort_keys: dict[CreatorKey, tuple] = {}  # YT 在前, 依 title 排序
+        self.root = _TrieNode()
+        self.__sorted: list[CreatorKey] | None = None
+
+    @classmethod
+    def from_db(cls, db: DB) -> 'CreatorIndex':
+        instance = cls(db)
+        for username, info in db.get_yt_users().items():
+            instance.add('yt', username, info)
+        for username, info in db.get_x_users().items():
+            instance.add('x', username, info)
+        return instance
+
+    def __terms(self, username: str, info: dict[str, str | int]) -> set[str]:
+        title = str(info.get('title') or '').lower()
+        return {username.lower(), title} | set(re.split(r'[\s\-_/|,.()\[\]【】「」]+', title)) - {''}
+
+    def add(self, platform: Literal['yt', 'x'], username: str, info: dict[str, str | int]):
+        key = (platform, username)
+        if key in self.creators:
+            self.remove(platform, username)
+        self.creators[key] = info
+        self.sort_keys[key] = (platform != 'yt', str(info.get('title') or '').lower(), username)
+        for term in self.__terms(username, info):
+            node = self.root
+            node.keys.add(key)
+            for char in term:
+                node = node.children.setdefault(char, _TrieNode())
+                node.keys.add(key)
+        self.__sorted = None
+
+    def remove(self, platform: Literal['yt', 'x'], username: str):
+        key = (platform, username)
+        if (info := self.creators.pop(key, None)) is None:
+            return
+        del self.sort_keys[key]
+        for term in self.__terms(username, info):
+            path = [self.root]
+            for char in term:
+                if (node := path[-1].children.get(char)) is None:
+                    break
+                path.append(node)
+            for node in path:
+                node.keys.discard(key)
+            # 移除沒有任何內容創作者的節點
+            for parent, char, node in reversed(list(zip(path, term, path[1:]))):
+                if not node.keys:
+                    del parent.children[char]
+        self.__sorted = None
+
+    def all(self) -> list[CreatorKey]:
+        """所有內容創作者, YT 在前, 依 title 排序"""
+        if self.__sorted is None:
+            self.__sorted = sorted(self.creators, key=self.sort_keys.__getitem__)
+        return self.__sorted
+
+    def search(self, prefix: str, limit: int=25) -> list[CreatorKey]:
+        """回傳 username, title 或 title 中單字以 prefix 開頭的內容創作者"""
+        prefix = prefix.strip().lower().lstrip('@')
+        if not prefix:
+            return self.all()[:limit]
+        node = self.root
+        for char in prefix:
+            if (node := node.children.get(char)) is None:
+                return []
+        return heapq.nsmallest(limit, node.keys, key=self.sort_keys.__getitem__)
+
+    def search_in(self, keys: set[CreatorKey], prefix: str, limit: int=25) -> list[CreatorKey]:
+        """比對方式同 search, 但只檢查 keys 中的內容創作者, 用於訂閱列表這類少量的集合"""
+        prefix = prefix.strip().lower().lstrip('@')
+        matched = [
+            key for key in keys
+            if key in self.creators and (not prefix or any(term.startswith(prefix) for term in self.__terms(key[1], self.creators[key])))
+        ]
+        return heapq.nsmallest(limit, matched, key=self.sort_keys.__getitem__)
+
+    def on_db_change(self, event: str, platform: Literal['yt', 'x']=None, usernames: list[str]=[], **kwargs):
+        """DB 監聽者, 從資料庫重新載入有變更的內容創作者"""
+        if event != 'creators':
+            return
+        users = self.db.get_yt_users(usernames) if platform == 'yt' else self.db.get_x_users(usernames)
+        for username in usernames:
+            if username in users:
+                self.add(platform, username, users[username])
+            else:
+                self.remove(platform, username)
@@ -1,33 +1,77 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import json
 import logging
+import os
 from pathlib import Path
 import sqlite3
-from typing import Literal
+from typing import Callable, Iterator, Literal
 
 from discord.utils import utcnow
 
+from . import metrics
+
 logger = logging.getLogger('discord')
 
 # 資料庫路徑
 BASE_PATH = Path(__file__).parent.parent
-DB_PATH = str(BASE_PATH / 'db' / 'sub.db')
+DB_PATH = os.getenv("DB_PATH", str(BASE_PATH / 'db' / 'sub.db'))
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "30"))  # 資料庫被其他連線鎖定時等待的秒數
 
+@metrics.db_methods
 class DB:
+    # 資料變更的監聽者, 所有 DB 實例共用, 用來讓記憶體中的快取與資料庫同步
+    _listeners: list[Callable[..., None]] = []
+    _created_paths: set[str] = set()  # 這個程序中已經建立過資料表的資料庫
+    
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
         
+    @classmethod
+    def add_listener(cls, listener: Callable[..., None]):
+        """
+        註冊資料變更監聽者, 在 commit 之後呼叫
+        listener('creators', platform=..., usernames=[...]): 內容創作者新增, 刪除或 title 等資料變更
+        listener('subs', dc_id=...): dc user 的訂閱變更
+        """
+        cls._listeners.append(listener)
+        
+    @classmethod
+    def remove_listener(cls, listener: Callable[..., None]):
+        if listener in cls._listeners:
+            cls._listeners.remove(listener)
+            
+    def _notify(self, event: str, **kwargs):
+        for listener in self._listeners:
+            try:
+                listener(event, **kwargs)
+            except Exception as e:
+                logger.error(f"資料變更監聽者執行失敗 ({event}): {e}")
+                
+    def _notify_updated_users(self, platform: Literal['yt', 'x'], users_data: dict[str, dict[str, str | int]]):
+        """只有 title, icon_url, description 變更時才通知, 只更新 last_updated 不算"""
+        usernames = [
+            username for username, data in users_data.items()
+            if any(key in data for key in ['title', 'icon_url', 'description'])
+        ]
+        if usernames:
+            self._notify('creators', platform=platform, usernames=usernames)
+        
     def _get_connection(self):
         """取得資料庫連接並啟用外鍵約束"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT)
         conn.execute("PRAGMA foreign_keys = ON")
         return conn
     
     @classmethod
-    def create_db(cls) -> 'DB':
-        """建立所需的資料表結構"""
-        instance = cls()  # 先建立實例
+    def create_db(cls, db_path: str=DB_PATH) -> 'DB':
+        """建立所需的資料表結構, 同一個程序中每個資料庫只會執行一次"""
+        instance = cls(db_path)  # 先建立實例
+        if db_path in cls._created_paths:
+            return instance
         conn = instance._get_connection()  # 使用實例方法
         cursor = conn.cursor()
+        # WAL 模式下讀取不會被寫入阻擋, 設定會保存在資料庫檔案中
+        cursor.execute("PRAGMA journal_mode = WAL")
         
         # 建立資料表
         cursor.executescript('''
@@ -68,6 +112,110 @@ class DB:
             PRIMARY KEY (dc_id, x_username),
             FOREIGN KEY (x_username) REFERENCES x_users(username) ON DELETE CASCADE
         );
+
+        -- Discord 使用者私訊頻道 (避免每次私訊都要 create_dm)
+        CREATE TABLE IF NOT EXISTS dc_users (
+            dc_id TEXT PRIMARY KEY,
+            dm_channel_id TEXT NOT NULL
+        );
+
+        -- 待傳送通知 (outbox), 輪詢結果與 last_updated 在同一個 transaction 寫入
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idem_key TEXT NOT NULL UNIQUE,  -- 同一則通知對同一個對象只會寫入一次
+            target_type TEXT NOT NULL DEFAULT 'dm',  -- dm: 私訊 dc user, channel: 發送到伺服器頻道
+            target_id TEXT NOT NULL,  -- dc_id 或 channel_id
+            payload TEXT NOT NULL,  -- json: {"content": ..., "embeds": [...]}, 廣播頻道另有 "role_id" 限制只 mention 該身分組
+            status TEXT NOT NULL DEFAULT 'pending',  -- pending, sent, failed
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            sent_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_attempt_at);
+
+        -- 每則內容的通知延遲, 不分訂閱者只記一筆
+        CREATE TABLE IF NOT EXISTS item_latency (
+            item_key TEXT PRIMARY KEY,  -- "{platform}:{item_id}", 即 outbox idem_key 去掉最後的傳送對象
+            platform TEXT NOT NULL,  -- yt or x
+            username TEXT NOT NULL,
+            published_at TEXT,  -- 內容發布時間
+            detected_at TEXT NOT NULL,  -- 輪詢發現並寫入 outbox 的時間
+            sent_at TEXT  -- 最後一則通知傳送成功的時間
+        );
+        CREATE INDEX IF NOT EXISTS idx_item_latency_detected ON item_latency (detected_at);
+
+        -- 伺服器廣播: 內容創作者綁定伺服器頻道, 新內容只在頻道發一次並 mention 訂閱身分組
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            platform TEXT NOT NULL,  -- yt or x
+            username TEXT NOT NULL,
+            guild_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            role_id TEXT NOT NULL,
+            PRIMARY KEY (platform, username, guild_id)
+        );
+
+        -- 已取得廣播身分組的訂閱者, 這些訂閱者由頻道 mention 通知, 不再私訊
+        CREATE TABLE IF NOT EXISTS broadcast_members (
+            platform TEXT NOT NULL,
+            username TEXT NOT NULL,
+            guild_id TEXT NOT NULL,
+            dc_id TEXT NOT NULL,
+            PRIMARY KEY (platform, username, guild_id, dc_id),
+            FOREIGN KEY (platform, username, guild_id) REFERENCES broadcasts(platform, username, guild_id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_broadcast_members_dc ON broadcast_members (platform, username, dc_id);
+
+        -- 快取失效紀錄, 多個程序共用資料庫時, 各自的記憶體快取依 seq 找出其他程序的變更
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            event TEXT NOT NULL,  -- creators or subs
+            key TEXT NOT NULL,  -- creators: "{platform}:{username}", subs: dc_id
+            seq INTEGER NOT NULL,  -- 每次變更遞增
+            PRIMARY KEY (event, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_versions_seq ON cache_versions (seq);
+
+        -- 多個 bot 程序共用資料庫時, 記錄存活的 worker
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            heartbeat_at TEXT NOT NULL
+        );
+
+        -- 內容創作者輪詢租約, 同一時間只有持有者會輪詢
+        CREATE TABLE IF NOT EXISTS poll_leases (
+            platform TEXT NOT NULL,  -- yt or x
+            username TEXT NOT NULL,
+            owner TEXT NOT NULL,  -- worker_id
+            expires_at TEXT NOT NULL,
+            PRIMARY KEY (platform, username)
+        );
+
+        -- 輪詢排程的 checkpoint, 重啟後從上次的進度繼續
+        CREATE TABLE IF NOT EXISTS poll_state (
+            platform TEXT NOT NULL,  -- yt or x
+            schedule TEXT NOT NULL,  -- yt: poll, refresh; x: queue
+            username TEXT NOT NULL,
+            value REAL NOT NULL,  -- yt: 下一次到期的 unix time, x: 上次輪詢的 unix time (佇列依此排序)
+            PRIMARY KEY (platform, schedule, username)
+        );
+
+        -- 追蹤中的 YT 直播, 只針對這些影片重新查詢狀態以通知開始與結束
+        CREATE TABLE IF NOT EXISTS live_tracker (
+            video_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,  -- yt_users.username
+            status TEXT NOT NULL,  -- upcoming or live
+            scheduled_start_at TEXT,
+            next_check_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_live_tracker_next ON live_tracker (next_check_at);
+
+        -- 內容創作者全文搜尋
+        CREATE VIRTUAL TABLE IF NOT EXISTS creators_fts USING fts5(
+            platform UNINDEXED,  -- yt or x
+            username,
+            title,
+            description
+        );
         ''')
 
         # 建立訂閱 Trigger
@@ -108,13 +256,222 @@ class DB:
             UPDATE x_users
             SET follower_cnt = follower_cnt - 1
             WHERE username = OLD.x_username;
-        END;                  
+        END;
+
+        -- 取消訂閱時移除身分組紀錄, 之後不再由頻道通知
+        CREATE TRIGGER IF NOT EXISTS after_yt_sub_delete_broadcast_member
+        AFTER DELETE ON dc_yt_sub
+        BEGIN
+            DELETE FROM broadcast_members WHERE platform = 'yt' AND username = OLD.yt_username AND dc_id = OLD.dc_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_sub_delete_broadcast_member
+        AFTER DELETE ON dc_x_sub
+        BEGIN
+            DELETE FROM broadcast_members WHERE platform = 'x' AND username = OLD.x_username AND dc_id = OLD.dc_id;
+        END;
+
+        -- 內容創作者與訂閱變更時更新 cache_versions, 讓其他程序清除快取
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_insert_cache
+        AFTER INSERT ON yt_users
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'yt:' || NEW.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_update_cache
+        AFTER UPDATE OF title, icon_url, description ON yt_users
+        WHEN OLD.title IS NOT NEW.title OR OLD.icon_url IS NOT NEW.icon_url OR OLD.description IS NOT NEW.description
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'yt:' || NEW.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_delete_cache
+        AFTER DELETE ON yt_users
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'yt:' || OLD.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_insert_cache
+        AFTER INSERT ON x_users
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'x:' || NEW.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_update_cache
+        AFTER UPDATE OF title, icon_url, description ON x_users
+        WHEN OLD.title IS NOT NEW.title OR OLD.icon_url IS NOT NEW.icon_url OR OLD.description IS NOT NEW.description
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'x:' || NEW.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_delete_cache
+        AFTER DELETE ON x_users
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('creators', 'x:' || OLD.username, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_sub_insert_cache
+        AFTER INSERT ON dc_yt_sub
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('subs', NEW.dc_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_sub_delete_cache
+        AFTER DELETE ON dc_yt_sub
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('subs', OLD.dc_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_sub_insert_cache
+        AFTER INSERT ON dc_x_sub
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('subs', NEW.dc_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_sub_delete_cache
+        AFTER DELETE ON dc_x_sub
+        BEGIN
+            INSERT INTO cache_versions (event, key, seq)
+            VALUES ('subs', OLD.dc_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_versions))
+            ON CONFLICT(event, key) DO UPDATE SET seq = excluded.seq;
+        END;
+
+        -- 刪除內容創作者時一併刪除廣播設定
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_delete
+        AFTER DELETE ON yt_users
+        BEGIN
+            DELETE FROM broadcasts WHERE platform = 'yt' AND username = OLD.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_delete
+        AFTER DELETE ON x_users
+        BEGIN
+            DELETE FROM broadcasts WHERE platform = 'x' AND username = OLD.username;
+        END;
+
+        -- 刪除 YT 頻道時停止追蹤它的直播
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_delete_live
+        AFTER DELETE ON yt_users
+        BEGIN
+            DELETE FROM live_tracker WHERE username = OLD.username;
+        END;
+
+        -- 刪除內容創作者時移除輪詢排程的 checkpoint
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_delete_poll_state
+        AFTER DELETE ON yt_users
+        BEGIN
+            DELETE FROM poll_state WHERE platform = 'yt' AND username = OLD.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_delete_poll_state
+        AFTER DELETE ON x_users
+        BEGIN
+            DELETE FROM poll_state WHERE platform = 'x' AND username = OLD.username;
+        END;
+        ''')
+
+        # 建立全文搜尋 Trigger, 並在第一次建立時匯入現有的內容創作者
+        cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_insert_fts
+        AFTER INSERT ON yt_users
+        BEGIN
+            INSERT INTO creators_fts (platform, username, title, description)
+            VALUES ('yt', NEW.username, NEW.title, NEW.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_update_fts
+        AFTER UPDATE OF title, description ON yt_users
+        WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        BEGIN
+            UPDATE creators_fts SET title = NEW.title, description = NEW.description
+            WHERE platform = 'yt' AND username = NEW.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_yt_user_delete_fts
+        AFTER DELETE ON yt_users
+        BEGIN
+            DELETE FROM creators_fts WHERE platform = 'yt' AND username = OLD.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_insert_fts
+        AFTER INSERT ON x_users
+        BEGIN
+            INSERT INTO creators_fts (platform, username, title, description)
+            VALUES ('x', NEW.username, NEW.title, NEW.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_update_fts
+        AFTER UPDATE OF title, description ON x_users
+        WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        BEGIN
+            UPDATE creators_fts SET title = NEW.title, description = NEW.description
+            WHERE platform = 'x' AND username = NEW.username;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS after_x_user_delete_fts
+        AFTER DELETE ON x_users
+        BEGIN
+            DELETE FROM creators_fts WHERE platform = 'x' AND username = OLD.username;
+        END;
+
+        INSERT INTO creators_fts (platform, username, title, description)
+        SELECT 'yt', username, title, description FROM yt_users
+        WHERE NOT EXISTS (SELECT 1 FROM creators_fts WHERE platform = 'yt');
+        INSERT INTO creators_fts (platform, username, title, description)
+        SELECT 'x', username, title, description FROM x_users
+        WHERE NOT EXISTS (SELECT 1 FROM creators_fts WHERE platform = 'x');
         ''')
 
         conn.commit()
         conn.close()
+        cls._created_paths.add(db_path)
         return instance
     
+    def _update_users(self, cursor: sqlite3.Cursor, table: Literal['yt_users', 'x_users'], users_data: dict[str, dict[str, str | int]]) -> dict[str, bool]:
+        """
+        在現有的 transaction 中更新多個使用者資料 (不 commit)
+        只會更新 title, icon_url, description, last_updated 欄位
+        """
+        results = {}
+        for username, data in users_data.items():
+            # 建立更新參數
+            params = []
+            query_parts = []
+            
+            for key, value in data.items():
+                if key in ['title', 'icon_url', 'description', 'last_updated']:
+                    query_parts.append(f"{key} = ?")
+                    params.append(value)
+            
+            if not query_parts:
+                results[username] = False
+                continue
+            
+            params.append(username)
+            query = f"UPDATE {table} SET {', '.join(query_parts)} WHERE username = ?"
+            
+            cursor.execute(query, params)
+            results[username] = True
+        return results
+    
     # YouTube相關操作
     def get_yt_users(self, usernames: list[str] = []) -> dict[str, dict[str, str | int]]:
         """
@@ -124,18 +481,22 @@ class DB:
 
         return: dict, 鍵為username, 值為username資料字典
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        if usernames:
-            placeholders = ', '.join(['?'] * len(usernames))
-            cursor.execute(f"SELECT * FROM yt_users WHERE username IN ({placeholders})", usernames)
-        else:
-            cursor.execute("SELECT * FROM yt_users")
-        results = cursor.fetchall()
-        conn.close()
-        return {row['username']: dict(row) for row in results}
+        try:
+            if usernames:
+                placeholders = ', '.join(['?'] * len(usernames))
+                cursor.execute(f"SELECT * FROM yt_users WHERE username IN ({placeholders})", usernames)
+            else:
+                cursor.execute("SELECT * FROM yt_users")
+            return {row['username']: dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"取得 YouTube 使用者失敗: {e}")
+            return {}
+        finally:
+            conn.close()
 
     def add_yt_user(self, username, channel_data):
         """新增YouTube使用者"""
@@ -157,6 +518,7 @@ class DB:
                 utcnow().isoformat()
             ))
             conn.commit()
+            self._notify('creators', platform='yt', usernames=[username])
             return True
         except Exception as e:
             logger.error(f"新增YouTube使用者失敗: {e}")
@@ -173,30 +535,11 @@ class DB:
         """
         conn = self._get_connection()
         cursor = conn.cursor()
-        results = {}
         
         try:
-            for username, data in users_data.items():
-                # 建立更新參數
-                params = []
-                query_parts = []
-                
-                for key, value in data.items():
-                    if key in ['title', 'icon_url', 'description', 'last_updated']:
-                        query_parts.append(f"{key} = ?")
-                        params.append(value)
-                
-                if not query_parts:
-                    results[username] = False
-                    continue
-                
-                params.append(username)
-                query = f"UPDATE yt_users SET {', '.join(query_parts)} WHERE username = ?"
-                
-                cursor.execute(query, params)
-                results[username] = True
-            
+            results = self._update_users(cursor, 'yt_users', users_data)
             conn.commit()
+            self._notify_updated_users('yt', users_data)
             return results
         except Exception as e:
             logger.error(f"更新多個 YT 使用者失敗: {e}")
@@ -218,6 +561,7 @@ class DB:
                 usernames
             )
             conn.commit()
+            self._notify('creators', platform='yt', usernames=usernames)
             return True
         except Exception as e:
             logger.error(f"刪除多個 YouTube 使用者失敗: {e}")
@@ -235,18 +579,22 @@ class DB:
 
         return: dict, 鍵為username, 值為username資料字典
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        if usernames:
-            placeholders = ', '.join(['?'] * len(usernames))
-            cursor.execute(f"SELECT * FROM x_users WHERE username IN ({placeholders})", usernames)
-        else:
-            cursor.execute("SELECT * FROM x_users")
-        results = cursor.fetchall()
-        conn.close()
-        return {row['username']: dict(row) for row in results}
+        try:
+            if usernames:
+                placeholders = ', '.join(['?'] * len(usernames))
+                cursor.execute(f"SELECT * FROM x_users WHERE username IN ({placeholders})", usernames)
+            else:
+                cursor.execute("SELECT * FROM x_users")
+            return {row['username']: dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"取得 X 使用者失敗: {e}")
+            return {}
+        finally:
+            conn.close()
 
     def add_x_user(self, username: str, data: dict[str, str]) -> bool:
         """
@@ -270,6 +618,7 @@ class DB:
                 utcnow().isoformat()
             ))
             conn.commit()
+            self._notify('creators', platform='x', usernames=[username])
             return True
         except Exception as e:
             logger.error(f"新增 X 使用者失敗: {e}")
@@ -286,30 +635,11 @@ class DB:
         """
         conn = self._get_connection()
         cursor = conn.cursor()
-        results = {}
         
         try:
-            for username, data in users_data.items():
-                # 建立更新參數
-                params = []
-                query_parts = []
-                
-                for key, value in data.items():
-                    if key in ['title', 'icon_url', 'description', 'last_updated']:
-                        query_parts.append(f"{key} = ?")
-                        params.append(value)
-                
-                if not query_parts:
-                    results[username] = False
-                    continue
-                
-                params.append(username)
-                query = f"UPDATE x_users SET {', '.join(query_parts)} WHERE username = ?"
-                
-                cursor.execute(query, params)
-                results[username] = True
-            
+            results = self._update_users(cursor, 'x_users', users_data)
             conn.commit()
+            self._notify_updated_users('x', users_data)
             return results
         except Exception as e:
             logger.error(f"更新多個 X 使用者失敗: {e}")
@@ -332,6 +662,7 @@ class DB:
                 usernames
             )
             conn.commit()
+            self._notify('creators', platform='x', usernames=usernames)
             return True
         except Exception as e:
             logger.error(f"刪除多個 X 使用者失敗: {e}")
@@ -344,18 +675,49 @@ class DB:
     # 訂閱相關操作
     def get_dc_user_subs(self, dc_id: str) -> tuple[list[str], list[str]]:
         """取得 dc user 的 yt & x 訂閱資料"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("SELECT yt_username FROM dc_yt_sub WHERE dc_id = ?", (dc_id,))
-        yt_subs = [row['yt_username'] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT x_username FROM dc_x_sub WHERE dc_id = ?", (dc_id,))
-        x_subs = [row['x_username'] for row in cursor.fetchall()]
+        try:
+            cursor.execute("SELECT yt_username FROM dc_yt_sub WHERE dc_id = ?", (dc_id,))
+            yt_subs = [row['yt_username'] for row in cursor.fetchall()]
+            
+            cursor.execute("SELECT x_username FROM dc_x_sub WHERE dc_id = ?", (dc_id,))
+            x_subs = [row['x_username'] for row in cursor.fetchall()]
+            return yt_subs, x_subs
+        except Exception as e:
+            logger.error(f"取得訂閱資料失敗: {e}")
+            return [], []
+        finally:
+            conn.close()
+
+    def get_dc_user_sub_view(self, dc_id: str) -> list[tuple[str, str, str]]:
+        """
+        以一次 JOIN 查詢取得 dc user 訂閱的內容創作者
+
+        return: [(platform, username, title)], YT 在前, 依 title 排序
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
         
-        conn.close()
-        return yt_subs, x_subs
+        try:
+            cursor.execute("""
+                SELECT 'yt' AS platform, u.username, u.title FROM dc_yt_sub s
+                JOIN yt_users u ON u.username = s.yt_username
+                WHERE s.dc_id = ?
+                UNION ALL
+                SELECT 'x' AS platform, u.username, u.title FROM dc_x_sub s
+                JOIN x_users u ON u.username = s.x_username
+                WHERE s.dc_id = ?
+                ORDER BY platform DESC, title
+            """, (dc_id, dc_id))
+            return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"取得訂閱列表失敗: {e}")
+            return []
+        finally:
+            conn.close()
 
     def add_dc_user_subs(self, dc_id: str, yt: list[str], x: list[str]) -> bool:
         """新增訂閱"""
@@ -376,6 +738,7 @@ class DB:
                 """, [(dc_id, username) for username in x])
             
             conn.commit()
+            self._notify('subs', dc_id=dc_id)
             return True
         except Exception as e:
             logger.error(f"DC 新增訂閱失敗: {e}")
@@ -404,6 +767,7 @@ class DB:
                 )
             
             conn.commit()
+            self._notify('subs', dc_id=dc_id)
             return True
         except Exception as e:
             logger.error(f"DC 移除訂閱失敗: {e}")
@@ -435,4 +799,691 @@ class DB:
             logger.error(f"取得 YT or X 訂閱者列表失敗: {e}")
             return []
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    # Discord 使用者相關操作
+    def get_dm_channels(self, dc_ids: list[str]) -> dict[str, str]:
+        """
+        取得 dc user 的私訊頻道 id
+
+        return: dict, 鍵為 dc_id, 值為 dm_channel_id, 沒有記錄的 dc_id 不會出現在結果中
+        """
+        if not dc_ids:
+            return {}
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            placeholders = ', '.join(['?'] * len(dc_ids))
+            cursor.execute(f"SELECT dc_id, dm_channel_id FROM dc_users WHERE dc_id IN ({placeholders})", dc_ids)
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"取得私訊頻道失敗: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def set_dm_channel(self, dc_id: str, dm_channel_id: str) -> bool:
+        """新增或更新 dc user 的私訊頻道 id"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                INSERT INTO dc_users (dc_id, dm_channel_id) VALUES (?, ?)
+                ON CONFLICT(dc_id) DO UPDATE SET dm_channel_id = excluded.dm_channel_id
+            """, (dc_id, dm_channel_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"儲存私訊頻道失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def del_dm_channel(self, dc_id: str) -> bool:
+        """刪除 dc user 的私訊頻道 id (頻道失效時使用)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("DELETE FROM dc_users WHERE dc_id = ?", (dc_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"刪除私訊頻道失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    # 通知 outbox 相關操作
+    def enqueue_notifications(
+        self,
+        platform: Literal['yt', 'x'],
+        users_data: dict[str, dict[str, str | int]],
+        notifications: list[tuple[str, str, dict]],
+        live_videos: dict[str, dict[str, str] | None] = {},
+        published_at: dict[str, str] = {},
+    ) -> bool:
+        """
+        在同一個 transaction 中寫入新通知並更新內容創作者資料 (last_updated 等)
+        任一步驟失敗則全部 rollback, 下次輪詢會重新取得相同內容
+
+        :param users_data: 同 update_yt_users / update_x_users
+        :param notifications: [(username, item_id, payload)]
+                              username 有綁定廣播頻道時, 每個頻道寫入一筆並在 content 前 mention 身分組,
+                              並展開給 username 的每位訂閱者, 已取得廣播身分組的訂閱者除外
+                              idempotency key 為 "{platform}:{item_id}:{dc_id}" 或 "{platform}:{item_id}:ch{channel_id}"
+        :param live_videos: 同時更新 live_tracker, {video_id: {username, status, scheduled_start_at, next_check_at}}
+                            值為 None 時停止追蹤
+        :param published_at: {item_id: 內容發布時間 (ISO)}, 記錄到 item_latency 計算通知延遲
+        """
+        if platform == 'yt':
+            table, sub_table, sub_column = 'yt_users', 'dc_yt_sub', 'yt_username'
+        else:
+            table, sub_table, sub_column = 'x_users', 'dc_x_sub', 'x_username'
+        now = utcnow().isoformat()
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany("""
+                INSERT OR IGNORE INTO item_latency (item_key, platform, username, published_at, detected_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(f"{platform}:{item_id}", platform, username, published_at.get(item_id), now) for username, item_id, _ in notifications])
+            for username, item_id, payload in notifications:
+                cursor.execute(
+                    "SELECT channel_id, role_id FROM broadcasts WHERE platform = ? AND username = ?",
+                    (platform, username)
+                )
+                if broadcasts := cursor.fetchall():
+                    for channel_id, role_id in broadcasts:
+                        content = f"<@&{role_id}>\n{payload['content']}" if payload.get('content') else f"<@&{role_id}>"
+                        cursor.execute("""
+                            INSERT OR IGNORE INTO outbox (idem_key, target_type, target_id, payload, next_attempt_at, created_at)
+                            VALUES (?, 'channel', ?, ?, ?, ?)
+                        """, (f"{platform}:{item_id}:ch{channel_id}", channel_id, json.dumps({**payload, 'content': content, 'role_id': role_id}), now, now))
+                # 不在廣播伺服器或沒有身分組的訂閱者仍然私訊
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO outbox (idem_key, target_type, target_id, payload, next_attempt_at, created_at)
+                    SELECT ? || s.dc_id, 'dm', s.dc_id, ?, ?, ?
+                    FROM {sub_table} s WHERE s.{sub_column} = ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM broadcast_members b
+                        WHERE b.platform = ? AND b.username = s.{sub_column} AND b.dc_id = s.dc_id
+                    )
+                """, (f"{platform}:{item_id}:", json.dumps(payload), now, now, username, platform))
+            self._update_users(cursor, table, users_data)
+            self._update_live_videos(cursor, live_videos)
+            conn.commit()
+            self._notify_updated_users(platform, users_data)
+            return True
+        except Exception as e:
+            logger.error(f"寫入 {platform} 通知失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def claim_outbox(self, limit: int, claim_seconds: float) -> list[dict]:
+        """
+        取出最多 limit 筆到期的待傳送通知, 並將它們的 next_attempt_at 延後 claim_seconds
+        若程式在傳送途中中斷, 這些通知會在 claim 到期後重新被取出
+
+        return: [{'id', 'target_type', 'target_id', 'payload', 'attempts'}], payload 已轉回 dict
+        """
+        now = utcnow()
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT id, target_type, target_id, payload, attempts FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+            """, (now.isoformat(), limit))
+            rows = [dict(row) for row in cursor.fetchall()]
+            if rows:
+                placeholders = ', '.join(['?'] * len(rows))
+                cursor.execute(
+                    f"UPDATE outbox SET next_attempt_at = ? WHERE id IN ({placeholders})",
+                    [(now + timedelta(seconds=claim_seconds)).isoformat()] + [row['id'] for row in rows]
+                )
+            conn.commit()
+            for row in rows:
+                row['payload'] = json.loads(row['payload'])
+            return rows
+        except Exception as e:
+            logger.error(f"取出待傳送通知失敗: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def finish_outbox(self, sent: list[int], retry: dict[int, float], failed: list[int]) -> bool:
+        """
+        記錄通知傳送結果
+        :param sent: 傳送成功的 id
+        :param retry: 需要重試的 id, 值為幾秒後重試
+        :param failed: 放棄傳送的 id
+        """
+        now = utcnow()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ? WHERE id = ?",
+                [(now.isoformat(), outbox_id) for outbox_id in sent]
+            )
+            if sent:
+                placeholders = ', '.join(['?'] * len(sent))
+                cursor.execute(f"SELECT idem_key FROM outbox WHERE id IN ({placeholders})", sent)
+                cursor.executemany(
+                    "UPDATE item_latency SET sent_at = ? WHERE item_key = ?",
+                    [(now.isoformat(), item_key) for item_key in {row[0].rsplit(':', 1)[0] for row in cursor.fetchall()}]
+                )
+            cursor.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                [((now + timedelta(seconds=delay)).isoformat(), outbox_id) for outbox_id, delay in retry.items()]
+            )
+            cursor.executemany(
+                "UPDATE outbox SET status = 'failed', attempts = attempts + 1 WHERE id = ?",
+                [(outbox_id,) for outbox_id in failed]
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"更新通知傳送結果失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def purge_outbox(self, days: int) -> int:
+        """刪除 days 天前建立且已完成 (sent / failed) 的通知, 回傳刪除數量"""
+        before = (utcnow() - timedelta(days=days)).isoformat()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM outbox WHERE status != 'pending' AND created_at < ?", (before,))
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"清除 outbox 失敗: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    # 直播追蹤相關操作
+    def _update_live_videos(self, cursor: sqlite3.Cursor, live_videos: dict[str, dict[str, str] | None]):
+        """在現有的 transaction 中新增, 更新或刪除追蹤中的直播 (不 commit)"""
+        cursor.executemany(
+            "DELETE FROM live_tracker WHERE video_id = ?",
+            [(video_id,) for video_id, data in live_videos.items() if data is None]
+        )
+        cursor.executemany("""
+            INSERT INTO live_tracker (video_id, username, status, scheduled_start_at, next_check_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (video_id) DO UPDATE SET
+                status = excluded.status,
+                scheduled_start_at = excluded.scheduled_start_at,
+                next_check_at = excluded.next_check_at
+        """, [
+            (video_id, data['username'], data['status'], data.get('scheduled_start_at'), data['next_check_at'])
+            for video_id, data in live_videos.items() if data is not None
+        ])
+
+    def get_due_live_videos(self, now: str, owner: str, limit: int=50) -> list[dict[str, str]]:
+        """
+        取得 owner 持有租約的頻道中 next_check_at 已到的直播, 最早到期的在前
+        先以租約過濾再 LIMIT, 其他 worker 逾期的直播不會佔用名額
+        """
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT t.video_id, t.username, t.status, t.scheduled_start_at FROM live_tracker t
+                JOIN poll_leases l ON l.platform = 'yt' AND l.username = t.username AND l.owner = ?
+                WHERE t.next_check_at <= ? ORDER BY t.next_check_at LIMIT ?
+            """, (owner, now, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"取得追蹤中的直播失敗: {e}")
+            return []
+        finally:
+            conn.close()
+
+    # 通知延遲相關操作
+    def get_item_latencies(self, since: str, platform: Literal['yt', 'x'] | None=None) -> list[dict[str, str]]:
+        """取得 since 之後發現的內容的延遲紀錄"""
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            query = "SELECT platform, username, published_at, detected_at, sent_at FROM item_latency WHERE detected_at >= ?"
+            params = [since]
+            if platform:
+                query += " AND platform = ?"
+                params.append(platform)
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"取得通知延遲失敗: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def purge_item_latency(self, days: int) -> int:
+        """刪除 days 天前的延遲紀錄, 回傳刪除數量"""
+        before = (utcnow() - timedelta(days=days)).isoformat()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM item_latency WHERE detected_at < ?", (before,))
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"清除通知延遲紀錄失敗: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    # 批次匯入與匯出
+    def import_data(
+        self,
+        yt_users: dict[str, dict[str, str]],
+        x_users: dict[str, dict[str, str]],
+        subs: list[tuple[str, Literal['yt', 'x'], str]],
+        broadcasts: list[tuple[Literal['yt', 'x'], str, str, str, str]] = [],
+        broadcast_members: list[tuple[Literal['yt', 'x'], str, str, str]] = [],
+        notify: bool = True,
+    ) -> dict[str, int] | None:
+        """
+        在同一個 transaction 中寫入所有內容創作者, 訂閱與廣播設定, 失敗則全部 rollback
+        已存在的資料略過, 內容創作者不存在的訂閱與廣播也略過
+
+        :param yt_users: username -> 同 add_yt_user 的 channel_data, 可另外帶 last_updated
+        :param x_users: username -> 同 add_x_user 的 data, 可另外帶 last_updated
+        :param subs: [(dc_id, platform, username)]
+        :param broadcasts: [(platform, username, guild_id, channel_id, role_id)]
+        :param broadcast_members: [(platform, username, guild_id, dc_id)], 已取得廣播身分組的訂閱者
+        :param notify: 在其他 thread 執行時設為 False, 之後由 event loop 呼叫 notify_import, 監聽者不是 thread-safe
+        :return: 各項實際新增的數量, 失敗時為 None
+        """
+        now = utcnow().isoformat()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            result = {}
+            cursor.executemany("""
+                INSERT OR IGNORE INTO yt_users (username, id, title, icon_url, uploads_id, description, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (username, data['id'], data['title'], data.get('icon_url', ''), data['uploads_id'], data.get('description', ''), data.get('last_updated') or now)
+                for username, data in yt_users.items()
+            ])
+            result['yt'] = cursor.rowcount
+            cursor.executemany("""
+                INSERT OR IGNORE INTO x_users (username, title, icon_url, description, last_updated)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (username, data['title'], data.get('icon_url', ''), data.get('description', ''), data.get('last_updated') or now)
+                for username, data in x_users.items()
+            ])
+            result['x'] = cursor.rowcount
+            
+            # 只訂閱已存在的內容創作者, 避免違反 foreign key
+            result['subs'] = 0
+            for platform, table, sub_table, sub_column in (('yt', 'yt_users', 'dc_yt_sub', 'yt_username'), ('x', 'x_users', 'dc_x_sub', 'x_username')):
+                cursor.executemany(f"""
+                    INSERT OR IGNORE INTO {sub_table} (dc_id, {sub_column})
+                    SELECT ?, username FROM {table} WHERE username = ?
+                """, [(dc_id, username) for dc_id, sub_platform, username in subs if sub_platform == platform])
+                result['subs'] += cursor.rowcount
+            
+            result['broadcasts'] = 0
+            for platform, table in (('yt', 'yt_users'), ('x', 'x_users')):
+                cursor.executemany(f"""
+                    INSERT OR IGNORE INTO broadcasts (platform, username, guild_id, channel_id, role_id)
+                    SELECT ?, username, ?, ?, ? FROM {table} WHERE username = ?
+                """, [
+                    (platform, guild_id, channel_id, role_id, username)
+                    for broadcast_platform, username, guild_id, channel_id, role_id in broadcasts if broadcast_platform == platform
+                ])
+                result['broadcasts'] += cursor.rowcount
+            cursor.executemany("""
+                INSERT OR IGNORE INTO broadcast_members (platform, username, guild_id, dc_id)
+                SELECT platform, username, guild_id, ? FROM broadcasts
+                WHERE platform = ? AND username = ? AND guild_id = ?
+            """, [(dc_id, platform, username, guild_id) for platform, username, guild_id, dc_id in broadcast_members])
+            result['broadcast_members'] = cursor.rowcount
+            conn.commit()
+            if notify:
+                self.notify_import(yt_users, x_users, subs)
+            return result
+        except Exception as e:
+            logger.error(f"批次匯入失敗: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def notify_import(self, yt_users: dict[str, dict[str, str]], x_users: dict[str, dict[str, str]], subs: list[tuple[str, Literal['yt', 'x'], str]]):
+        """通知監聽者 import_data 寫入的內容創作者與訂閱"""
+        self._notify('creators', platform='yt', usernames=list(yt_users.keys()))
+        self._notify('creators', platform='x', usernames=list(x_users.keys()))
+        for dc_id in {dc_id for dc_id, _, _ in subs}:
+            self._notify('subs', dc_id=dc_id)
+
+    def iter_export(self) -> Iterator[dict[str, str]]:
+        """依序產生所有內容創作者, 訂閱與廣播設定, 逐筆讀取不會一次載入整個資料庫"""
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        
+        try:
+            for row in conn.execute("SELECT username, id, title, icon_url, uploads_id, description, last_updated FROM yt_users"):
+                yield {'type': 'creator', 'platform': 'yt', **dict(row)}
+            for row in conn.execute("SELECT username, title, icon_url, description, last_updated FROM x_users"):
+                yield {'type': 'creator', 'platform': 'x', **dict(row)}
+            for row in conn.execute("SELECT dc_id, yt_username AS username FROM dc_yt_sub"):
+                yield {'type': 'sub', 'platform': 'yt', **dict(row)}
+            for row in conn.execute("SELECT dc_id, x_username AS username FROM dc_x_sub"):
+                yield {'type': 'sub', 'platform': 'x', **dict(row)}
+            for row in conn.execute("SELECT platform, username, guild_id, channel_id, role_id FROM broadcasts"):
+                yield {'type': 'broadcast', **dict(row)}
+            for row in conn.execute("SELECT platform, username, guild_id, dc_id FROM broadcast_members"):
+                yield {'type': 'broadcast_member', **dict(row)}
+        finally:
+            conn.close()
+
+    # 伺服器廣播相關操作
+    def get_broadcasts(self, platform: Literal['yt', 'x'], usernames: list[str]) -> list[dict[str, str]]:
+        """取得內容創作者綁定的所有廣播頻道"""
+        if not usernames:
+            return []
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            placeholders = ', '.join(['?'] * len(usernames))
+            cursor.execute(
+                f"SELECT * FROM broadcasts WHERE platform = ? AND username IN ({placeholders})",
+                [platform] + usernames
+            )
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"取得廣播設定失敗: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_guild_broadcasts(self, guild_id: str) -> dict[tuple[str, str], dict[str, str]]:
+        """
+        取得伺服器內的廣播設定
+
+        return: dict, 鍵為 (platform, username), 值為廣播設定
+        """
+        conn = self._get_connection()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT * FROM broadcasts WHERE guild_id = ?", (guild_id,))
+            return {(row['platform'], row['username']): dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"取得伺服器廣播設定失敗: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def set_broadcast(self, platform: Literal['yt', 'x'], username: str, guild_id: str, channel_id: str, role_id: str) -> bool:
+        """新增或更新伺服器廣播設定"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO broadcasts (platform, username, guild_id, channel_id, role_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(platform, username, guild_id)
+                DO UPDATE SET channel_id = excluded.channel_id, role_id = excluded.role_id
+            """, (platform, username, guild_id, channel_id, role_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"設定廣播失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def del_broadcast(self, platform: Literal['yt', 'x'], username: str, guild_id: str) -> bool:
+        """刪除伺服器廣播設定"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(
+                "DELETE FROM broadcasts WHERE platform = ? AND username = ? AND guild_id = ?",
+                (platform, username, guild_id)
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"刪除廣播失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def add_broadcast_members(self, platform: Literal['yt', 'x'], username: str, guild_id: str, dc_ids: list[str]) -> bool:
+        """記錄已取得廣播身分組的訂閱者, 廣播設定已被刪除時略過"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany("""
+                INSERT OR IGNORE INTO broadcast_members (platform, username, guild_id, dc_id)
+                SELECT platform, username, guild_id, ? FROM broadcasts
+                WHERE platform = ? AND username = ? AND guild_id = ?
+            """, [(dc_id, platform, username, guild_id) for dc_id in dc_ids])
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"記錄廣播身分組失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    # 輪詢租約相關操作
+    def heartbeat_worker(self, worker_id: str, ttl: float) -> list[str]:
+        """
+        更新 worker 的心跳時間並移除超過 ttl 秒沒有心跳的 worker
+
+        return: 所有存活的 worker_id (包含自己)
+        """
+        now = utcnow()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO workers (worker_id, heartbeat_at) VALUES (?, ?)
+                ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+            """, (worker_id, now.isoformat()))
+            cursor.execute("DELETE FROM workers WHERE heartbeat_at < ?", ((now - timedelta(seconds=ttl)).isoformat(),))
+            cursor.execute("SELECT worker_id FROM workers")
+            workers = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return workers
+        except Exception as e:
+            logger.error(f"更新 worker 心跳失敗: {e}")
+            conn.rollback()
+            return [worker_id]
+        finally:
+            conn.close()
+
+    def acquire_leases(self, platform: Literal['yt', 'x'], worker_id: str, usernames: list[str], ttl: float) -> list[str]:
+        """
+        取得或續約 usernames 的輪詢租約, 並釋放自己持有但不在 usernames 內的租約
+        只有租約不存在, 已過期或本來就屬於自己時才能取得
+
+        return: 目前由自己持有租約的 username
+        """
+        now = utcnow()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany("""
+                INSERT INTO poll_leases (platform, username, owner, expires_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(platform, username) DO UPDATE
+                SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE poll_leases.owner = excluded.owner OR poll_leases.expires_at < ?
+            """, [(platform, username, worker_id, (now + timedelta(seconds=ttl)).isoformat(), now.isoformat()) for username in usernames])
+            
+            cursor.execute("SELECT username FROM poll_leases WHERE platform = ? AND owner = ?", (platform, worker_id))
+            owned = set(row[0] for row in cursor.fetchall())
+            released = list(owned - set(usernames))
+            if released:
+                placeholders = ', '.join(['?'] * len(released))
+                cursor.execute(
+                    f"DELETE FROM poll_leases WHERE platform = ? AND owner = ? AND username IN ({placeholders})",
+                    [platform, worker_id] + released
+                )
+            conn.commit()
+            return [username for username in usernames if username in owned]
+        except Exception as e:
+            logger.error(f"取得輪詢租約失敗: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def release_leases(self, platform: Literal['yt', 'x'], worker_id: str) -> bool:
+        """釋放 worker 在 platform 上的所有租約並移除 worker, 讓其他 worker 立即接手"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM poll_leases WHERE platform = ? AND owner = ?", (platform, worker_id))
+            cursor.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"釋放輪詢租約失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    # 跨程序快取失效相關操作
+    def get_cache_changes(self, since: int | None=None) -> tuple[int, list[tuple[str, str]]]:
+        """
+        取得 seq 大於 since 的變更, since 為 None 時只回傳目前的 seq
+
+        return: (最新的 seq, [(event, key)])
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_versions")
+            seq = cursor.fetchone()[0]
+            if since is None or seq <= since:
+                return seq, []
+            cursor.execute("SELECT event, key FROM cache_versions WHERE seq > ? AND seq <= ?", (since, seq))
+            return seq, cursor.fetchall()
+        except Exception as e:
+            logger.error(f"取得快取變更失敗: {e}")
+            return since or 0, []
+        finally:
+            conn.close()
+
+    # 輪詢排程 checkpoint 相關操作
+    def get_poll_state(self, platform: Literal['yt', 'x'], schedule: str) -> dict[str, float]:
+        """return: {username: value}"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT username, value FROM poll_state WHERE platform = ? AND schedule = ?", (platform, schedule))
+            return {username: value for username, value in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"讀取輪詢排程失敗: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def save_poll_state(self, platform: Literal['yt', 'x'], schedule: str, state: dict[str, float]) -> bool:
+        """
+        寫入排程狀態, 只覆蓋 state 中的 username
+        多個 worker 各自寫入自己負責的 username, 不會互相覆蓋
+        """
+        if not state:
+            return True
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany("""
+                INSERT INTO poll_state (platform, schedule, username, value) VALUES (?, ?, ?, ?)
+                ON CONFLICT(platform, schedule, username) DO UPDATE SET value = excluded.value
+            """, [(platform, schedule, username, value) for username, value in state.items()])
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"寫入輪詢排程失敗: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    # 搜尋相關操作
+    def search_creators(self, query: str, limit: int=10) -> list[tuple[str, str]]:
+        """
+        以全文搜尋 username, title 與 description, 每個單字都以前綴比對
+        依相關度排序, 相關度相近時訂閱人數多的在前
+
+        return: [(platform, username)]
+        """
+        terms = ['"' + term.replace('"', '""') + '"*' for term in query.split()]
+        if not terms:
+            return []
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT m.platform, m.username FROM (
+                    SELECT platform, username, bm25(creators_fts, 0.0, 5.0, 10.0, 1.0) AS score
+                    FROM creators_fts WHERE creators_fts MATCH ?
+                ) m
+                LEFT JOIN yt_users y ON m.platform = 'yt' AND y.username = m.username
+                LEFT JOIN x_users x ON m.platform = 'x' AND x.username = m.username
+                ORDER BY round(m.score, 1), COALESCE(y.follower_cnt, x.follower_cnt, 0) DESC
+                LIMIT ?
+            """, (' '.join(terms), limit))
+            return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"搜尋內容創作者失敗: {e}")
+            return []
+        finally:
+            conn.close()
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Callable, Hashable
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(values: list[float]) -> tuple[float, ...]:
+    """nearest-rank 百分位數, 沒有資料時回傳空 tuple"""
+    if not values:
+        return ()
+    values = sorted(values)
+    return tuple(values[min(len(values) - 1, max(0, -(-len(values) * p // 100) - 1))] for p in PERCENTILES)
+
+
+def summarize(rows: list[dict[str, str]], key: Callable[[dict[str, str]], Hashable]) -> dict[Hashable, dict]:
+    """
+    依 key 分組計算延遲 (秒)
+    detect: 發布 -> 輪詢發現, deliver: 發布 -> 最後一則通知送達
+
+    return: {group: {'count': 內容數, 'detect': (p50, p95, p99), 'deliver': (p50, p95, p99)}}
+    """
+    groups: dict[Hashable, dict[str, list[float]]] = {}
+    for row in rows:
+        group = groups.setdefault(key(row), {'detect': [], 'deliver': []})
+        if not row['published_at']:
+            continue
+        published = datetime.fromisoformat(row['published_at'])
+        group['detect'].append((datetime.fromisoformat(row['detected_at']) - published).total_seconds())
+        if row['sent_at']:
+            group['deliver'].append((datetime.fromisoformat(row['sent_at']) - published).total_seconds())
+    return {
+        name: {'count': len(values['detect']), 'detect': percentiles(values['detect']), 'deliver': percentiles(values['deliver'])}
+        for name, values in groups.items()
+    }
+
+
+def format_duration(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 60 * 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def format_percentiles(values: tuple[float, ...]) -> str:
+    if not values:
+        return "-"
+    return ' / '.join(format_duration(value) for value in values)
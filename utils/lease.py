@@ -0,0 +1,50 @@
+import hashlib
+import logging
+import os
+import socket
+from typing import Literal
+
+from .db import DB
+
+logger = logging.getLogger('discord')
+
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_TTL = float(os.getenv("LEASE_TTL", "600"))  # 租約與 worker 心跳的有效時間 (秒), 需大於輪詢間隔
+
+
+class LeaseManager:
+    """
+    將內容創作者分配給多個共用同一個資料庫的 bot 程序輪詢
+
+    - 每個程序是一個 worker, 每次輪詢前更新心跳, 超過 ttl 沒有心跳的 worker 視為離線
+    - 以 rendezvous hashing 將 username 分配給存活的 worker, worker 加入或離線時只有少部分 username 會換手
+    - 真正輪詢前要取得 DB 中的租約, 舊的持有者釋放或租約過期後新的 worker 才能接手, 避免重複輪詢
+    """
+    def __init__(self, db: DB, worker_id: str=WORKER_ID, ttl: float=LEASE_TTL):
+        self.db = db
+        self.worker_id = worker_id
+        self.ttl = ttl
+
+    def __owner(self, platform: str, username: str, workers: list[str]) -> str:
+        def score(worker: str) -> int:
+            return int.from_bytes(hashlib.sha1(f"{worker}:{platform}:{username}".encode()).digest()[:8], 'big')
+        return max(workers, key=score)
+
+    def acquire(self, platform: Literal['yt', 'x'], usernames: list[str]) -> list[str]:
+        """
+        取得分配給自己的 username 的租約, 需要在每次輪詢前呼叫以續約
+
+        return: 這次應該由自己輪詢的 username
+        """
+        workers = self.db.heartbeat_worker(self.worker_id, self.ttl)
+        if self.worker_id not in workers:
+            workers.append(self.worker_id)
+        assigned = [username for username in usernames if self.__owner(platform, username, workers) == self.worker_id]
+        owned = self.db.acquire_leases(platform, self.worker_id, assigned, self.ttl)
+        if len(owned) < len(assigned):
+            logger.info(f"{platform} 有 {len(assigned) - len(owned)} 個租約尚未釋放, 等待其他 worker 交接")
+        return owned
+
+    def release(self, platform: Literal['yt', 'x']):
+        """關閉時釋放租約, 讓其他 worker 立即接手"""
+        self.db.release_leases(platform, self.worker_id)
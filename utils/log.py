@@ -0,0 +1,84 @@
+import copy
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # 個別模組的等級, 例如 discord.gateway=INFO,discord.http=WARNING
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text or json
+
+TEXT_FORMAT = '[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s'
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class JsonFormatter(logging.Formatter):
+    """一行一筆的精簡 json"""
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            't': self.formatTime(record, DATE_FORMAT),
+            'lvl': record.levelname,
+            'name': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class _QueueHandler(QueueHandler):
+    """
+    呼叫端只合併訊息參數並轉換 traceback, 格式化與寫檔都交給背景的 QueueListener
+    預設的 QueueHandler.prepare 會在呼叫端執行完整的 format
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """將 'name=LEVEL,name=LEVEL' 轉成 {name: LEVEL}"""
+    levels = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def get_formatter(fmt: str=LOG_FORMAT) -> logging.Formatter:
+    if fmt == 'json':
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
+
+def setup_queue_logging(*handlers: logging.Handler, fmt: str=LOG_FORMAT, level: str=LOG_LEVEL, levels: str=LOG_LEVELS, logger_name: str='discord') -> QueueListener:
+    """
+    logger 只把紀錄放進佇列, 由背景執行緒的 QueueListener 格式化並寫入 handlers
+    回傳已啟動的 QueueListener, 結束前需呼叫 stop() 將佇列中剩餘的紀錄寫完
+    """
+    formatter = get_formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level.upper())
+    logger.addHandler(_QueueHandler(log_queue))
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener.start()
+    return listener
@@ -0,0 +1,202 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+from typing import Callable
+
+logger = logging.getLogger('discord')
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 表示不啟用
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# 未啟用時所有裝飾器直接回傳原函式, 記錄函式也會立即返回
+enabled = METRICS_PORT > 0
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str='') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, value: float=1, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]=(), buckets: tuple[float, ...]=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [各 bucket 的數量 (不累加), sum, count]
+        self.values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        if not enabled:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        if (entry := self.values.get(key)) is None:
+            entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + str(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+TASK_LOOP_SECONDS = Histogram('subbot_task_loop_seconds', 'Duration of one task loop iteration', ('task',))
+TASK_LOOP_ERRORS = Counter('subbot_task_loop_errors_total', 'Task loop iterations that raised', ('task',))
+API_CALL_SECONDS = Histogram('subbot_api_call_seconds', 'Duration of YouTube / X API calls', ('api', 'method'))
+API_CALL_ERRORS = Counter('subbot_api_call_errors_total', 'YouTube / X API calls that raised', ('api', 'method'))
+YT_QUOTA_UNITS = Counter('subbot_yt_quota_units_total', 'YouTube Data API quota units spent', ('method',))
+DB_QUERY_SECONDS = Histogram('subbot_db_query_seconds', 'Duration of DB methods', ('method',))
+LOOP_LAG_SECONDS = Histogram('subbot_event_loop_lag_seconds', 'How late the event loop woke up a periodic sleep')
+TASK_LOOP_BLOCKING_SECONDS = Histogram('subbot_task_loop_blocking_seconds', 'Time a task loop iteration spent blocking the event loop', ('task',))
+DELIVERIES = Counter('subbot_deliveries_total', 'Notification send outcomes', ('target', 'result'))
+
+REGISTRY = [
+    TASK_LOOP_SECONDS, TASK_LOOP_ERRORS, TASK_LOOP_BLOCKING_SECONDS, LOOP_LAG_SECONDS,
+    API_CALL_SECONDS, API_CALL_ERRORS, YT_QUOTA_UNITS,
+    DB_QUERY_SECONDS,
+    DELIVERIES,
+]
+
+
+def render() -> str:
+    """Prometheus text format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _wrap(func: Callable, observe: Callable[[float], None], error: Callable[[], None]) -> Callable:
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                error()
+                raise
+            finally:
+                observe(time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            error()
+            raise
+        finally:
+            observe(time.perf_counter() - start)
+    return wrapper
+
+
+def task_loop(task: str) -> Callable:
+    """記錄 tasks.loop 每次執行的時間與錯誤, 需放在 @tasks.loop 之下"""
+    def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+        return _wrap(
+            func,
+            lambda elapsed: TASK_LOOP_SECONDS.observe(elapsed, task=task),
+            lambda: TASK_LOOP_ERRORS.inc(task=task),
+        )
+    return decorator
+
+
+def api_call(api: str, method: str, quota: int=0) -> Callable:
+    """記錄 api 呼叫的時間與錯誤, quota > 0 時同時累計 YouTube 配額"""
+    def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+
+        def observe(elapsed: float):
+            API_CALL_SECONDS.observe(elapsed, api=api, method=method)
+            if quota:
+                YT_QUOTA_UNITS.inc(quota, method=method)
+        return _wrap(func, observe, lambda: API_CALL_ERRORS.inc(api=api, method=method))
+    return decorator
+
+
+def db_methods(cls: type) -> type:
+    """
+    類別裝飾器, 記錄所有 public method 的執行時間
+    generator (例如 iter_export) 呼叫時只建立 generator, 查詢在迭代時才執行, 不記錄
+    """
+    if not enabled:
+        return cls
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not callable(attr) or isinstance(attr, (classmethod, staticmethod)):
+            continue
+        if inspect.isgeneratorfunction(attr):
+            continue
+        setattr(cls, name, _wrap(
+            attr,
+            functools.partial(lambda method, elapsed: DB_QUERY_SECONDS.observe(elapsed, method=method), name),
+            lambda: None,
+        ))
+    return cls
+
+
+async def start_server():
+    """啟用時在 METRICS_HOST:METRICS_PORT 提供 /metrics"""
+    if not enabled:
+        return
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    logger.info(f"metrics server: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
@@ -0,0 +1,163 @@
+import asyncio
+import cProfile
+import functools
+import heapq
+import io
+import logging
+import os
+from pathlib import Path
+import pstats
+import time
+import types
+from typing import Callable
+
+from . import metrics
+
+logger = logging.getLogger('discord')
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))  # 事件迴圈延遲取樣間隔 (秒)
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))  # 延遲超過此秒數時寫入 log, 0 表示不取樣
+SLOW_LOOP_THRESHOLD = float(os.getenv("SLOW_LOOP_THRESHOLD", "1.0"))  # task loop 阻塞事件迴圈超過此秒數時寫入報告, 0 表示不記錄
+PROFILE_WORST = int(os.getenv("PROFILE_WORST", "0"))  # 每個 task loop 保留最慢 N 次的 cProfile 結果, 0 表示不啟用
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")  # 設定時將 cProfile 結果另存為 .prof 檔
+
+PROJECT_PATH = str(Path(__file__).parent.parent)
+SLOWEST_STEPS = 3  # 報告中列出的最慢區段數量
+
+
+class LoopLagMonitor:
+    """
+    定期 sleep interval 秒, 實際醒來的時間比預期晚多少就是事件迴圈被阻塞的時間
+    延遲超過 threshold 時寫入 log, 並記錄到 metrics
+    """
+    def __init__(self, interval: float=LOOP_LAG_INTERVAL, threshold: float=LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.task: asyncio.Task | None = None
+
+    def start(self):
+        if self.threshold <= 0 or self.task is not None:
+            return
+        self.task = asyncio.create_task(self.__run(), name='loop-lag-monitor')
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def __run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.max_lag = max(self.max_lag, lag)
+            metrics.LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                logger.warning(f"事件迴圈被阻塞 {lag:.3f} 秒")
+
+
+def _location(coro, default: str) -> str:
+    """coroutine 目前暫停的位置, 沿著 await 鏈找到最內層屬於本專案的 frame, 沒有時使用最外層的 frame"""
+    location = default
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        filename = frame.f_code.co_filename
+        if location == default or filename.startswith(PROJECT_PATH):
+            location = f"{os.path.relpath(filename, PROJECT_PATH) if filename.startswith(PROJECT_PATH) else filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return location
+
+
+class _Iteration:
+    def __init__(self, profiler: cProfile.Profile | None):
+        self.blocking = 0.0
+        self.steps: list[tuple[float, str, str]] = []  # (秒數, 開始位置, 結束位置)
+        self.profiler = profiler
+
+
+@types.coroutine
+def _timed(coro, iteration: _Iteration):
+    """
+    代替事件迴圈逐步驅動 coroutine, 每次 send 到下一次暫停之間都是同步執行, 也就是阻塞事件迴圈的時間
+    只計算這個 coroutine 本身, 以 asyncio.gather / create_task 產生的子 task 不在內
+    """
+    value, error = None, None
+    while True:
+        location = _location(coro, '<start>')
+        if iteration.profiler is not None:
+            try:
+                iteration.profiler.enable()
+            except ValueError:  # 已經有其他 profiler 在執行
+                iteration.profiler = None
+        start = time.perf_counter()
+        try:
+            if error is not None:
+                yielded = coro.throw(error)
+            else:
+                yielded = coro.send(value)
+        except StopIteration as e:
+            return e.value
+        finally:
+            elapsed = time.perf_counter() - start
+            if iteration.profiler is not None:
+                iteration.profiler.disable()
+            iteration.blocking += elapsed
+            iteration.steps.append((elapsed, location, _location(coro, '<end>')))
+
+        try:
+            value, error = (yield yielded), None
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:
+            value, error = None, e
+
+
+def profile_loop(task: str) -> Callable:
+    """
+    記錄 tasks.loop 每次執行的總時間, 阻塞事件迴圈的時間與最慢的區段, 需放在 @tasks.loop 之下
+    阻塞超過 SLOW_LOOP_THRESHOLD 時寫入報告, PROFILE_WORST > 0 時附上最慢 N 次的 cProfile 結果
+    """
+    def decorator(func: Callable) -> Callable:
+        if SLOW_LOOP_THRESHOLD <= 0:
+            return func
+        worst: list[float] = []  # 最慢 N 次的阻塞時間 (min heap)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            iteration = _Iteration(cProfile.Profile() if PROFILE_WORST > 0 else None)
+            start = time.perf_counter()
+            try:
+                return await _timed(func(*args, **kwargs), iteration)
+            finally:
+                wall = time.perf_counter() - start
+                metrics.TASK_LOOP_BLOCKING_SECONDS.observe(iteration.blocking, task=task)
+                if iteration.blocking >= SLOW_LOOP_THRESHOLD:
+                    report(iteration, wall)
+
+        def report(iteration: _Iteration, wall: float):
+            lines = [f"{task} 執行 {wall:.3f} 秒, 其中阻塞事件迴圈 {iteration.blocking:.3f} 秒, 最慢的區段:"]
+            for elapsed, begin, end in heapq.nlargest(SLOWEST_STEPS, iteration.steps):
+                lines.append(f"  {elapsed:.3f}s  {begin} -> {end}")
+
+            if iteration.profiler is not None and (len(worst) < PROFILE_WORST or iteration.blocking > worst[0]):
+                if len(worst) < PROFILE_WORST:
+                    heapq.heappush(worst, iteration.blocking)
+                else:
+                    heapq.heapreplace(worst, iteration.blocking)
+                stream = io.StringIO()
+                pstats.Stats(iteration.profiler, stream=stream).sort_stats('cumulative').print_stats(15)
+                lines.append(stream.getvalue())
+                if PROFILE_DIR:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    path = os.path.join(PROFILE_DIR, f"{task}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+                    iteration.profiler.dump_stats(path)
+                    lines.append(f"cProfile 結果已存至 {path}")
+            logger.warning('\n'.join(lines))
+
+        return wrapper
+    return decorator
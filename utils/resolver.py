@@ -0,0 +1,115 @@
+from collections import OrderedDict
+import logging
+import time
+
+import discord
+from discord.ext import commands
+
+from .constants import USER_CACHE_SIZE, NEGATIVE_CACHE_TTL
+from .db import DB
+
+logger = logging.getLogger('discord')
+
+
+class UserResolver:
+    """
+    解析 Discord 使用者與其私訊頻道
+
+    - 私訊頻道 id 保存在 DB (dc_users), 之後直接對頻道 id 傳送訊息, 不需要 create_dm
+    - bot.get_user 找不到時改用 fetch_user, 結果放入 LRU 快取
+    - fetch_user 回傳 NotFound 的使用者放入負面快取, 一段時間內不再查詢
+    """
+    def __init__(self, bot: commands.Bot, db: DB, maxsize: int=USER_CACHE_SIZE, negative_ttl: float=NEGATIVE_CACHE_TTL):
+        self.bot = bot
+        self.db = db
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self.users: OrderedDict[int, discord.User] = OrderedDict()
+        self.missing: dict[int, float] = {}  # user id -> 負面快取到期時間 (monotonic)
+        self.dm_channels: dict[int, int] = {}  # user id -> dm channel id
+
+    async def get_user(self, user_id: int) -> discord.User | None:
+        """依序查詢 bot 快取, LRU 快取, 最後才呼叫 fetch_user"""
+        if user := self.bot.get_user(user_id):
+            return user
+
+        if user_id in self.users:
+            self.users.move_to_end(user_id)
+            return self.users[user_id]
+
+        expire = self.missing.get(user_id)
+        if expire is not None:
+            if expire > time.monotonic():
+                return None
+            del self.missing[user_id]
+
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            self.missing[user_id] = time.monotonic() + self.negative_ttl
+            return None
+        except discord.HTTPException as e:
+            logger.error(f"fetch_user 失敗 ({user_id}): {e}")
+            return None
+
+        self.users[user_id] = user
+        if len(self.users) > self.maxsize:
+            self.users.popitem(last=False)
+        return user
+
+    def prefetch(self, user_ids: list[int]):
+        """一次從 DB 載入多個使用者的私訊頻道 id"""
+        unknown = [str(user_id) for user_id in user_ids if user_id not in self.dm_channels]
+        for dc_id, channel_id in self.db.get_dm_channels(unknown).items():
+            self.dm_channels[int(dc_id)] = int(channel_id)
+
+    async def get_dm_channel_id(self, user_id: int) -> int | None:
+        if user_id not in self.dm_channels:
+            self.prefetch([user_id])
+        if user_id in self.dm_channels:
+            return self.dm_channels[user_id]
+
+        user = await self.get_user(user_id)
+        if user is None:
+            return None
+        try:
+            dm_channel = user.dm_channel or await user.create_dm()
+        except discord.HTTPException as e:
+            logger.error(f"create_dm 失敗 ({user_id}): {e}")
+            return None
+
+        self.dm_channels[user_id] = dm_channel.id
+        self.db.set_dm_channel(str(user_id), str(dm_channel.id))
+        return dm_channel.id
+
+    def forget(self, user_id: int):
+        """私訊頻道失效時清除記錄, 下次傳送時重新建立"""
+        self.dm_channels.pop(user_id, None)
+        self.db.del_dm_channel(str(user_id))
+
+    async def send(self, user_id: int, **kwargs) -> bool | None:
+        """
+        直接對快取的私訊頻道傳送訊息
+        kwargs 與 discord.abc.Messageable.send 相同
+
+        return: True 傳送成功, False 無法傳送 (使用者不存在或拒收私訊), None 暫時性錯誤, 可以重試
+        """
+        for _ in range(2):
+            channel_id = await self.get_dm_channel_id(user_id)
+            if channel_id is None:
+                return False if user_id in self.missing else None
+
+            channel = self.bot.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+            try:
+                await channel.send(**kwargs)
+                return True
+            except discord.NotFound:
+                # 頻道已不存在, 清除後重試一次
+                self.forget(user_id)
+            except discord.Forbidden:
+                logger.warning(f"無法私訊使用者 {user_id}")
+                return False
+            except discord.HTTPException as e:
+                logger.error(f"私訊使用者 {user_id} 失敗: {e}")
+                return None
+        return None
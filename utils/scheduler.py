@@ -0,0 +1,85 @@
+import hashlib
+import random
+import time
+
+
+class PollScheduler:
+    """
+    將輪詢平均分散在 period 內, 避免所有內容創作者在同一時間發出請求
+
+    - 每個 key 依 hash 取得固定的偏移量, 每個週期在 (週期起點 + 偏移量) 時到期
+    - 偏移量只跟 key 有關, 重啟或多個程序之間都會得到相同的排程
+    - jitter > 0 時在到期時間後再加上 0 ~ jitter 秒的隨機延遲
+    - checkpoint() / restore() 保存與還原到期時間, 重啟期間錯過的 key 會在重啟後補上, 不會等到下一個週期
+    """
+    def __init__(self, period: float, jitter: float=0.0, salt: str=''):
+        self.period = period
+        self.jitter = min(jitter, period)
+        self.salt = salt
+        self.next_due: dict[str, float] = {}
+        self.in_flight: dict[str, float] = {}  # 已到期但尚未完成的 key -> 原本的到期時間
+        self.restored: dict[str, float] = {}  # 還原的到期時間, key 第一次出現時使用
+        self.restored_until = 0.0
+
+    def offset(self, key: str) -> float:
+        digest = hashlib.sha1(f"{self.salt}:{key}".encode()).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64 * self.period
+
+    def next_slot(self, key: str, now: float) -> float:
+        """key 在 now 之後的下一個到期時間"""
+        slot = now - now % self.period + self.offset(key)
+        if slot <= now:
+            slot += self.period
+        if self.jitter:
+            slot += random.uniform(0, self.jitter)
+        return slot
+
+    def due(self, keys: list[str], now: float | None=None) -> list[str]:
+        """
+        回傳已到期的 key 並排定它們的下一次到期時間
+        第一次出現的 key 使用還原的到期時間, 沒有時排在下一個時段, 不在 keys 中的 key 會被移除
+        """
+        now = time.time() if now is None else now
+        keys = set(keys)
+        for key in list(self.next_due):
+            if key not in keys:
+                del self.next_due[key]
+                self.in_flight.pop(key, None)
+
+        # 還原的狀態只在重啟後一個週期內有效, 之後才取得租約的 key 由其他 worker 輪詢過, 重新排程
+        if self.restored and now >= self.restored_until:
+            self.restored.clear()
+
+        due = []
+        for key in keys:
+            if key not in self.next_due:
+                restored = self.restored.pop(key, None)
+                self.next_due[key] = restored if restored is not None else self.next_slot(key, now)
+            if self.next_due[key] <= now:
+                due.append(key)
+                self.in_flight[key] = self.next_due[key]
+                self.next_due[key] = self.next_slot(key, now)
+        return due
+
+    def finish(self, key: str):
+        """due() 回傳的 key 完成輪詢後呼叫, 未完成的 key 在 checkpoint 中保留原本的到期時間"""
+        self.in_flight.pop(key, None)
+
+    def checkpoint(self) -> dict[str, float]:
+        """目前的到期時間, 未完成的 key 為原本的到期時間, 還原後會立即重新輪詢"""
+        return {**self.next_due, **{key: due for key, due in self.in_flight.items() if key in self.next_due}}
+
+    def restore(self, state: dict[str, float], now: float | None=None):
+        """
+        還原 checkpoint 的到期時間
+        重啟期間已到期的 key 保持原本的間隔, 從 now 開始重新分散 (最長一個週期), 不會在重啟後同時到期
+        """
+        now = time.time() if now is None else now
+        overdue = sorted((due, key) for key, due in state.items() if due <= now)
+        self.restored = {key: min(due, now + self.period + self.jitter) for key, due in state.items() if due > now}
+        if overdue:
+            oldest, newest = overdue[0][0], overdue[-1][0]
+            scale = min(1.0, self.period / (newest - oldest)) if newest > oldest else 1.0
+            for due, key in overdue:
+                self.restored[key] = now + (due - oldest) * scale
+        self.restored_until = now + self.period
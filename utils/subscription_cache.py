@@ -0,0 +1,46 @@
+from collections import OrderedDict
+import time
+
+from .constants import SUB_CACHE_SIZE, SUB_CACHE_TTL
+from .db import DB
+
+
+class SubscriptionCache:
+    """
+    dc user 訂閱列表的 LRU 快取, 快取命中時不需要查詢資料庫
+
+    以 DB.add_listener(cache.on_db_change) 註冊後:
+    - dc user 的訂閱變更時清除該使用者的快取
+    - 內容創作者資料變更或刪除時清除有訂閱該創作者的快取
+    """
+    def __init__(self, db: DB, maxsize: int=SUB_CACHE_SIZE, ttl: float=SUB_CACHE_TTL):
+        self.db = db
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.views: OrderedDict[str, tuple[float, list[tuple[str, str, str]]]] = OrderedDict()
+
+    def get(self, dc_id: str) -> list[tuple[str, str, str]]:
+        """return: [(platform, username, title)], 同 DB.get_dc_user_sub_view"""
+        if (entry := self.views.get(dc_id)) and entry[0] > time.monotonic():
+            self.views.move_to_end(dc_id)
+            return entry[1]
+
+        view = self.db.get_dc_user_sub_view(dc_id)
+        self.views[dc_id] = (time.monotonic() + self.ttl, view)
+        self.views.move_to_end(dc_id)
+        if len(self.views) > self.maxsize:
+            self.views.popitem(last=False)
+        return view
+
+    def get_keys(self, dc_id: str) -> set[tuple[str, str]]:
+        """return: 訂閱的 (platform, username)"""
+        return set((platform, username) for platform, username, _ in self.get(dc_id))
+
+    def on_db_change(self, event: str, dc_id: str=None, platform: str=None, usernames: list[str]=[], **kwargs):
+        if event == 'subs':
+            self.views.pop(dc_id, None)
+        elif event == 'creators':
+            changed = set((platform, username) for username in usernames)
+            for key, (_, view) in list(self.views.items()):
+                if any((p, u) in changed for p, u, _ in view):
+                    del self.views[key]
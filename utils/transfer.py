@@ -0,0 +1,260 @@
+"""
+內容創作者與訂閱的批次匯入 / 匯出
+
+檔案格式為 JSON 陣列, JSON Lines 或 CSV, 每一列一筆資料, 以 type 欄位區分:
+- creator: platform, username, 其餘欄位 (id, title, uploads_id ...) 可省略, 缺少時才呼叫 API 查詢
+- sub: platform, username, dc_id
+- broadcast: platform, username, guild_id, channel_id, role_id
+- broadcast_member: platform, username, guild_id, dc_id (已取得廣播身分組的訂閱者)
+沒有 type 欄位時, 有 dc_id 視為訂閱 (內容創作者一併匯入), 否則視為內容創作者
+
+python -m utils.transfer export backup.jsonl
+python -m utils.transfer import backup.jsonl
+"""
+import asyncio
+import csv
+from dataclasses import dataclass, field
+import io
+import json
+import logging
+import os
+from typing import IO, Literal
+
+from .db import DB
+
+logger = logging.getLogger('discord')
+
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "4"))  # 匯入時同時進行的 API 查詢數量
+
+PLATFORMS = ('yt', 'x')
+CREATOR_FIELDS = ('id', 'title', 'icon_url', 'uploads_id', 'description', 'last_updated')
+CSV_FIELDS = ('type', 'platform', 'username', 'dc_id', 'guild_id', 'channel_id', 'role_id') + CREATOR_FIELDS
+
+
+@dataclass
+class ImportData:
+    creators: dict[tuple[str, str], dict[str, str]] = field(default_factory=dict)  # (platform, username) -> 檔案中的欄位
+    subs: set[tuple[str, str, str]] = field(default_factory=set)  # (dc_id, platform, username)
+    broadcasts: dict[tuple[str, str, str], tuple[str, str, str, str, str]] = field(default_factory=dict)  # (platform, username, guild_id) -> 廣播設定
+    broadcast_members: set[tuple[str, str, str, str]] = field(default_factory=set)  # (platform, username, guild_id, dc_id)
+    errors: list[str] = field(default_factory=list)
+
+    def add(self, row: dict[str, str], line: int):
+        platform = str(row.get('platform') or '').strip().lower()
+        username = str(row.get('username') or '').strip().removeprefix('@')
+        if platform not in PLATFORMS or not username:
+            self.errors.append(f"第 {line} 筆: platform 或 username 錯誤")
+            return
+
+        # 同一個內容創作者出現多次時, 合併檔案中提供的欄位
+        creator = self.creators.setdefault((platform, username), {})
+        creator.update({key: str(row[key]) for key in CREATOR_FIELDS if row.get(key)})
+
+        row_type = row.get('type') or ('sub' if row.get('dc_id') else 'creator')
+        if row_type == 'sub':
+            if not row.get('dc_id'):
+                self.errors.append(f"第 {line} 筆: 訂閱缺少 dc_id")
+                return
+            self.subs.add((str(row['dc_id']), platform, username))
+        elif row_type == 'broadcast':
+            if not all(row.get(key) for key in ('guild_id', 'channel_id', 'role_id')):
+                self.errors.append(f"第 {line} 筆: 廣播缺少 guild_id, channel_id 或 role_id")
+                return
+            self.broadcasts[(platform, username, str(row['guild_id']))] = (
+                platform, username, str(row['guild_id']), str(row['channel_id']), str(row['role_id'])
+            )
+        elif row_type == 'broadcast_member':
+            if not row.get('guild_id') or not row.get('dc_id'):
+                self.errors.append(f"第 {line} 筆: 廣播身分組缺少 guild_id 或 dc_id")
+                return
+            self.broadcast_members.add((platform, username, str(row['guild_id']), str(row['dc_id'])))
+        elif row_type != 'creator':
+            self.errors.append(f"第 {line} 筆: 未知的 type {row_type}")
+
+
+def parse(data: bytes, filename: str='') -> ImportData:
+    """依副檔名或內容判斷 CSV, JSON 陣列或 JSON Lines"""
+    result = ImportData()
+    text = data.decode('utf-8-sig')
+
+    if filename.lower().endswith('.csv'):
+        for line, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+            result.add(row, line)
+        return result
+
+    if text.lstrip().startswith('['):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            result.errors.append(f"JSON 格式錯誤: {e}")
+            return result
+        for line, row in enumerate(rows, start=1):
+            if isinstance(row, dict):
+                result.add(row, line)
+            else:
+                result.errors.append(f"第 {line} 筆: 不是物件")
+        return result
+
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except json.JSONDecodeError as e:
+            result.errors.append(f"第 {line} 行: JSON 格式錯誤: {e}")
+            continue
+        if isinstance(row, dict):
+            result.add(row, line)
+        else:
+            result.errors.append(f"第 {line} 行: 不是物件")
+    return result
+
+
+async def resolve_creators(
+    creators: dict[tuple[str, str], dict[str, str]],
+    yt_api,
+    x_api,
+    concurrency: int=IMPORT_CONCURRENCY,
+) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, str]], list[tuple[str, str]]]:
+    """
+    補齊內容創作者資訊
+    - 檔案已提供完整欄位的內容創作者不呼叫 API
+    - YT 只有頻道 ID 的以 channels.list 每 50 個一次批次查詢
+    - 只有 handle 的 YT 與 X 內容創作者逐一查詢, 同時最多 concurrency 個
+
+    return: (yt_users, x_users, 查不到的 (platform, username))
+    """
+    yt_users: dict[str, dict[str, str]] = {}
+    x_users: dict[str, dict[str, str]] = {}
+    by_id: dict[str, list[str]] = {}  # 頻道 ID -> usernames, 同一頻道只查一次
+    lookups: list[tuple[str, str]] = []
+
+    for (platform, username), data in creators.items():
+        if platform == 'yt':
+            if all(data.get(key) for key in ('id', 'title', 'uploads_id')):
+                yt_users[username] = data
+            elif data.get('id'):
+                by_id.setdefault(data['id'], []).append(username)
+            else:
+                lookups.append((platform, username))
+        else:
+            if data.get('title'):
+                x_users[username] = data
+            else:
+                lookups.append((platform, username))
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def limited(coro_func, *args):
+        async with semaphore:
+            return await coro_func(*args)
+
+    tasks = []
+    if by_id:
+        ids = list(by_id)
+        tasks.append(limited(asyncio.to_thread, yt_api.get_channels_info, ids))
+    for platform, username in lookups:
+        if platform == 'yt':
+            tasks.append(limited(asyncio.to_thread, yt_api.get_channel_info, username))
+        else:
+            tasks.append(limited(x_api.get_new_user_info, username))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    missing: list[tuple[str, str]] = []
+    if by_id:
+        infos = results[0]
+        results = results[1:]
+        if isinstance(infos, BaseException):
+            logger.error(f"批次查詢 YT 頻道失敗: {infos}")
+            infos = {}
+        for user_id, usernames in by_id.items():
+            for username in usernames:
+                if info := infos.get(user_id):
+                    yt_users[username] = {**info, **creators[('yt', username)]}
+                else:
+                    missing.append(('yt', username))
+
+    for (platform, username), info in zip(lookups, results):
+        if isinstance(info, BaseException):
+            logger.error(f"查詢內容創作者失敗 ({platform}:{username}): {info}")
+            info = {}
+        if not info:
+            missing.append((platform, username))
+        elif platform == 'yt':
+            yt_users[username] = {**info, **creators[(platform, username)]}
+        else:
+            x_users[username] = {**info, **creators[(platform, username)]}
+    return yt_users, x_users, missing
+
+
+async def import_data(db: DB, data: ImportData, yt_api, x_api, skip: set[tuple[str, str]]=set()) -> tuple[dict[str, int] | None, list[tuple[str, str]]]:
+    """
+    解析後的資料寫入資料庫, skip 為已存在而不需要查詢的內容創作者
+    return: (DB.import_data 的結果, 查不到的內容創作者)
+    """
+    creators = {key: value for key, value in data.creators.items() if key not in skip}
+    yt_users, x_users, missing = await resolve_creators(creators, yt_api, x_api)
+    subs = sorted(data.subs)
+    # 寫入在 thread 中進行, 監聽者 (CreatorIndex 等) 回到 event loop 後才通知
+    result = await asyncio.to_thread(
+        db.import_data, yt_users, x_users, subs, list(data.broadcasts.values()), sorted(data.broadcast_members), notify=False
+    )
+    if result is not None:
+        db.notify_import(yt_users, x_users, subs)
+    return result, missing
+
+
+def write_export(db: DB, fp: IO[bytes], fmt: Literal['jsonl', 'csv']='jsonl') -> int:
+    """將 DB.iter_export 逐筆寫入二進位檔案, 回傳筆數"""
+    stream = io.TextIOWrapper(fp, encoding='utf-8', newline='')
+    count = 0
+    try:
+        if fmt == 'csv':
+            writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for row in db.iter_export():
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in db.iter_export():
+                stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+                count += 1
+        stream.flush()
+    finally:
+        stream.detach()  # 不關閉呼叫端的檔案
+    return count
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="內容創作者與訂閱的批次匯入 / 匯出")
+    parser.add_argument('action', choices=['export', 'import'])
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='', help='匯出格式, 預設依副檔名判斷')
+    args = parser.parse_args()
+
+    db = DB.create_db()
+    if args.action == 'export':
+        fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+        with open(args.path, 'wb') as fp:
+            count = write_export(db, fp, fmt)
+        print(f"已匯出 {count} 筆")
+        return
+
+    from api.x_api import XAPI
+    from api.yt_api import YoutubeAPI
+
+    with open(args.path, 'rb') as fp:
+        data = parse(fp.read(), args.path)
+    for error in data.errors:
+        print(error)
+    skip = {('yt', username) for username in db.get_yt_users()} | {('x', username) for username in db.get_x_users()}
+    result, missing = asyncio.run(import_data(db, data, YoutubeAPI(), XAPI(), skip))
+    for platform, username in missing:
+        print(f"找不到內容創作者: {platform}:{username}")
+    print(f"匯入結果: {result}")
+
+
+if __name__ == '__main__':
+    main()